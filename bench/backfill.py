@@ -0,0 +1,190 @@
+"""Rebuild hourly energy and pellet statistics from recorded history.
+
+    python -m bench.backfill --device my_heater --nominal-power 25 \\
+        [--efficiency 90] [--pellet-energy 4.8] [--sender comfort_3] \\
+        [--energy-start KWH] [--pellet-start KG] [--time-zone ZONE] \\
+        [--output FILE] FILE...
+
+Every FILE is either a capture recorded by the integration, or a history
+CSV exported from Home Assistant (entity_id,state,last_changed) holding the
+boiler output sensor. Pass files oldest first. Samples go through the same
+integrator as the live sensor, one hour at a time, and come out as CSV rows
+(statistic_id,unit,start,state,sum) for the statistic ids the integration
+imports itself. State is the lifetime counter, starting at --energy-start
+and --pellet-start. Sum is what the counter grew since the first row, which
+is what the Energy dashboard shows.
+
+Each hour is integrated as one batch with EnergyIntegrator.add_samples,
+in plain Python. Nothing is vectorised, as numpy is not a requirement of
+the integration.
+
+Import the CSV into the recorder with the kwb_heaters.import_statistics
+service. The file has to be in allowlist_external_dirs. Rows replace those
+of the same hours, and the live statistics continue from the last row.
+
+Daily pellet buckets roll over at midnight in --time-zone, which should be
+the time zone of Home Assistant. It defaults to the zone of this machine.
+
+Captures only carry monotonic time. Each file is anchored to wall time by
+its modification time, which is when its last record was written.
+"""
+
+import argparse
+import csv
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone, tzinfo
+import itertools
+import mmap
+import os
+import sys
+from zoneinfo import ZoneInfo
+
+from custom_components.kwb_heaters.const import DEFAULT_MAX_INTEGRATION_GAP, DOMAIN
+from custom_components.kwb_heaters.src.impl.bus.capture import (
+    is_capture,
+    iter_records,
+)
+from custom_components.kwb_heaters.src.impl.bus.frame import FrameParser
+from custom_components.kwb_heaters.src.impl.bus.signal_map import (
+    SignalMap,
+    load_signal_map,
+)
+from custom_components.kwb_heaters.src.impl.consumption import PelletCounter
+from custom_components.kwb_heaters.src.impl.energy import EnergyIntegrator
+from custom_components.kwb_heaters.src.impl.statistics import STATISTIC_COUNTERS
+
+OUTPUT_KEY = "boiler_output"
+
+
+def capture_samples(
+    path: str, signal_map: SignalMap, key: str
+) -> Iterator[tuple[float, float]]:
+    """Yield (wall seconds, value) of a signal from a capture file."""
+    message_id = signal_map.message_ids[key]
+    decoder = signal_map.decoders[message_id]
+    end_time = os.path.getmtime(path)
+    # Mapped, so records are read from disk as they are walked
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    last_ns = None
+    for last_ns, _ in iter_records(data):
+        pass
+    if last_ns is None:
+        return
+    parser = FrameParser()
+    for timestamp_ns, chunk in iter_records(data):
+        wall = end_time - (last_ns - timestamp_ns) / 1e9
+        for frame in parser.feed(chunk):
+            if frame.message_id == message_id:
+                value = decoder.decode(frame.payload).get(key)
+                if value is not None:
+                    yield wall, value
+
+
+def history_samples(
+    path: str, entity_id: str | None = None
+) -> Iterator[tuple[float, float]]:
+    """Yield (wall seconds, value) from a Home Assistant history CSV.
+
+    States that are not numbers, like unavailable, are skipped.
+    """
+    parse = datetime.fromisoformat
+    with open(path, newline="") as file:
+        rows = csv.reader(file)
+        header = next(rows)
+        entity, state, changed = (
+            header.index(column) for column in ("entity_id", "state", "last_changed")
+        )
+        for row in rows:
+            if entity_id and row[entity] != entity_id:
+                continue
+            try:
+                value = float(row[state])
+            except ValueError:
+                continue
+            yield parse(row[changed]).timestamp(), value
+
+
+def hourly(
+    samples: Iterable[tuple[float, float]],
+    energy: EnergyIntegrator,
+    pellets: PelletCounter | None,
+    zone: tzinfo | None = None,
+) -> Iterator[tuple[datetime, float, float | None]]:
+    """Integrate samples hour by hour.
+
+    Yields the start of every hour that has samples, with the lifetime
+    energy and pellet consumption at its end. Pellets are counted on the
+    day the hour starts in zone, the local zone if None.
+    """
+    for hour, batch in itertools.groupby(samples, key=lambda sample: sample[0] // 3600):
+        timestamps, outputs = zip(*batch)
+        heat = energy.add_samples(outputs, timestamps)
+        start = datetime.fromtimestamp(hour * 3600, timezone.utc)
+        if pellets is not None and heat:
+            pellets.add(heat / energy.efficiency, start.astimezone(zone).date())
+        yield start, energy.energy, pellets.total if pellets else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="Captures or history CSVs")
+    parser.add_argument("--device", required=True, help="Slug of the unique id")
+    parser.add_argument("--nominal-power", type=float, required=True, help="kW")
+    parser.add_argument("--efficiency", type=float, help="Percent")
+    parser.add_argument("--pellet-energy", type=float, help="kWh/kg")
+    parser.add_argument("--max-gap", type=float, default=DEFAULT_MAX_INTEGRATION_GAP)
+    parser.add_argument("--sender", default="comfort_3")
+    parser.add_argument("--entity", help="Boiler output entity in history CSVs")
+    parser.add_argument("--energy-start", type=float, default=0.0, help="kWh")
+    parser.add_argument("--pellet-start", type=float, default=0.0, help="kg")
+    parser.add_argument("--time-zone", help="Time zone of Home Assistant")
+    parser.add_argument("--output", help="CSV file to write instead of stdout")
+    args = parser.parse_args()
+
+    signal_map = None
+    sources = []
+    for path in args.files:
+        if is_capture(path):
+            signal_map = signal_map or load_signal_map(args.sender)
+            sources.append(capture_samples(path, signal_map, OUTPUT_KEY))
+        else:
+            sources.append(history_samples(path, args.entity))
+
+    energy = EnergyIntegrator(
+        args.nominal_power, args.efficiency, args.max_gap, args.energy_start
+    )
+    pellets = (
+        PelletCounter(args.pellet_energy, total=args.pellet_start)
+        if args.pellet_energy
+        else None
+    )
+    zone = ZoneInfo(args.time_zone) if args.time_zone else None
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.writer(output)
+        writer.writerow(("statistic_id", "unit", "start", "state", "sum"))
+        counters = {
+            key: (f"{DOMAIN}:{args.device}_{key}", unit)
+            for key, (_, unit) in STATISTIC_COUNTERS.items()
+        }
+        for start, energy_total, pellet_total in hourly(
+            itertools.chain.from_iterable(sources), energy, pellets, zone
+        ):
+            for key, value, first in (
+                ("boiler_energy_output", energy_total, args.energy_start),
+                ("pellet_consumption", pellet_total, args.pellet_start),
+            ):
+                if value is not None:
+                    statistic_id, unit = counters[key]
+                    writer.writerow(
+                        (statistic_id, unit, start.isoformat(), value, value - first)
+                    )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Benchmark the scrape and decode path by replaying a KWB byte stream.
+
+    python -m bench.scrape [--capture FILE] [--sender comfort_3] [--scrapes 200]
+
+FILE is a capture recorded by the integration, or raw bytes as read from
+the gateway. Without one, a stream is generated from the signal maps.
+Files are memory mapped and fed to the parsers in views of the map, so
+even large captures are never read in whole. Every path reads the same
+bytes from a local replay reader, so the numbers only measure framing and
+decoding.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable, Iterator
+import mmap
+import random
+import statistics
+import time
+import tracemalloc
+
+from pykwb.kwb import ByteReader, KWBMessageStream
+
+from custom_components.kwb_heaters.src.impl.appliance import Appliance
+from custom_components.kwb_heaters.src.impl.bus.capture import (
+    is_capture,
+    iter_records,
+)
+from custom_components.kwb_heaters.src.impl.bus.decoder import decode_payload
+from custom_components.kwb_heaters.src.impl.bus.frame import FrameParser, encode_frame
+from custom_components.kwb_heaters.src.impl.bus.signal_map import (
+    SignalMap,
+    load_signal_map,
+)
+
+CHUNK_SIZE = 1024
+
+# Returns a new iterator over the chunks of a byte stream on every call
+Chunks = Callable[[], Iterator[memoryview]]
+
+
+class ReplayByteReader(ByteReader):
+    """pykwb reader that serves a byte stream chunk by chunk, forever."""
+
+    def __init__(self, chunks: Chunks):
+        self.chunks = chunks
+        self._chunks = chunks()
+        self._chunk = memoryview(b"")
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, size=1):
+        data = bytearray()
+        while len(data) < size:
+            if not self._chunk:
+                self._chunk = next(self._chunks, None)
+                if self._chunk is None:
+                    self._chunks = self.chunks()
+                    continue
+            part = self._chunk[: size - len(data)]
+            data += part
+            self._chunk = self._chunk[len(part) :]
+        return bytes(data)
+
+
+class ReplayAsyncReader:
+    """Stand-in for AsyncTCPByteReader that serves a byte stream, forever."""
+
+    def __init__(self, chunks: Chunks):
+        self.chunks = chunks
+        self._chunks = chunks()
+        self.parser = FrameParser()
+        self.is_open = False
+
+    async def async_open(self):
+        self.is_open = True
+
+    async def async_close(self):
+        self.is_open = False
+
+    async def async_read_frames(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._chunks = self.chunks()
+            chunk = next(self._chunks)
+        return self.parser.feed(chunk)
+
+
+def generate_stream(signal_map: SignalMap, cycles: int) -> bytes:
+    """Build a stream with every mapped message once per cycle."""
+    rng = random.Random(0)
+    stream = bytearray()
+    for counter in range(cycles):
+        for message_id, decoder in signal_map.decoders.items():
+            payload = bytes(rng.randrange(256) for _ in range(decoder.payload_size))
+            stream += encode_frame(message_id, counter % 256, payload)
+    return bytes(stream)
+
+
+def map_file(path: str) -> mmap.mmap:
+    """Map a file instead of reading it in."""
+    with open(path, "rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def slices(buffer) -> Chunks:
+    """Walk a byte stream in views of CHUNK_SIZE bytes, copying nothing."""
+    view = memoryview(buffer)
+    return lambda: (
+        view[position : position + CHUNK_SIZE]
+        for position in range(0, len(view), CHUNK_SIZE)
+    )
+
+
+def capture_chunks(buffer) -> Chunks:
+    """Walk the chunks of a capture as they were recorded, copying nothing."""
+    return lambda: (chunk for _, chunk in iter_records(buffer))
+
+
+def percentiles(samples: list[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return "p50 {:.2f} ms  p90 {:.2f} ms  p99 {:.2f} ms".format(
+        cuts[49] * 1000, cuts[89] * 1000, cuts[98] * 1000
+    )
+
+
+def bench_decode(name, frames, decode, count):
+    """Report throughput and allocations kept by the results of a decoder."""
+    start = time.perf_counter()
+    for frame in frames:
+        decode(frame)
+    elapsed = time.perf_counter() - start
+    signals = sum(count(frame) for frame in frames)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [decode(frame) for frame in frames]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del kept
+
+    print(
+        f"{name:<20} {len(frames) / elapsed:>12,.0f} frames/s "
+        f"{signals / elapsed:>14,.0f} signals/s "
+        f"{blocks / len(frames):>6.1f} blocks/frame {size / len(frames):>8.0f} B/frame"
+    )
+
+
+def bench_scrapes(name, scrape, scrapes):
+    latencies = []
+    for _ in range(scrapes):
+        start = time.perf_counter()
+        scrape()
+        latencies.append(time.perf_counter() - start)
+    print(f"{name:<20} {percentiles(latencies)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--capture", help="Raw byte stream recorded from a gateway")
+    parser.add_argument("--sender", default="comfort_3")
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--scrapes", type=int, default=200)
+    args = parser.parse_args()
+
+    signal_map = load_signal_map(args.sender)
+    if args.capture and is_capture(args.capture):
+        chunks = capture_chunks(map_file(args.capture))
+    elif args.capture:
+        chunks = slices(map_file(args.capture))
+    else:
+        chunks = slices(generate_stream(signal_map, args.cycles))
+
+    size = 0
+    frames = []
+    frame_parser = FrameParser()
+    for chunk in chunks():
+        size += len(chunk)
+        frames += [
+            frame
+            for frame in frame_parser.feed(chunk)
+            if frame.message_id in signal_map.decoders
+        ]
+    print(f"{size:,} bytes, {len(frames):,} mapped frames\n")
+
+    # Framing
+    start = time.perf_counter()
+    parser_frames = 0
+    frame_parser = FrameParser()
+    for chunk in chunks():
+        parser_frames += len(frame_parser.feed(chunk))
+    elapsed = time.perf_counter() - start
+    print(f"{'framing':<20} {parser_frames / elapsed:>12,.0f} frames/s")
+
+    # Decoding
+    messages = signal_map.messages
+    decoders = signal_map.decoders
+
+    def count(frame):
+        return len(decode_payload(frame.payload, messages[frame.message_id]))
+
+    bench_decode(
+        "decode generic",
+        frames,
+        lambda frame: decode_payload(frame.payload, messages[frame.message_id]),
+        count,
+    )
+
+    def decode_compiled(frame):
+        decoder = decoders[frame.message_id]
+        return decoder.decode(frame.payload), decoder.decode_bits(frame.payload)
+
+    bench_decode("decode compiled", frames, decode_compiled, count)
+    print()
+
+    # Scraping
+    config = {"unique_id": "bench", "host": "localhost", "port": 0, "timeout": 2}
+
+    appliance = Appliance({**config, "persistent_connection": False}, signal_map)
+    appliance.message_stream = KWBMessageStream(
+        reader=ReplayByteReader(chunks),
+        signal_maps=signal_map.raw,
+        heater_config=appliance.heater_config,
+        last_values=appliance.last_values,
+    )
+    bench_scrapes("scrape (pykwb)", appliance.scrape, args.scrapes)
+
+    appliance = Appliance({**config, "persistent_connection": False}, signal_map)
+    appliance.async_reader = ReplayAsyncReader(chunks)
+    loop = asyncio.new_event_loop()
+    bench_scrapes(
+        "async_scrape",
+        lambda: loop.run_until_complete(appliance.async_scrape()),
+        args.scrapes,
+    )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
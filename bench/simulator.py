@@ -0,0 +1,193 @@
+"""Simulate a KWB Comfort 3 bus behind an RS485 to TCP gateway.
+
+    python -m bench.simulator --port 8899 [--rate 20] [--corrupt 0.01] ...
+
+Point a config entry at the host and port and it connects exactly as it
+would to a real gateway. Faults can be switched on to soak test
+reconnects, resyncing and event loop impact without hardware.
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import logging
+import random
+
+from custom_components.kwb_heaters.src.impl.bus.frame import encode_frame
+from custom_components.kwb_heaters.src.impl.bus.signal_map import load_signal_map
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MESSAGE_IDS = (32, 33, 64, 65)
+DEFAULT_PAYLOAD_SIZE = 16
+
+
+@dataclass
+class SimulatorConfig:
+    """What the simulated bus sends, and how badly."""
+
+    message_ids: tuple[int, ...] = DEFAULT_MESSAGE_IDS
+    # Messages per second, over all message ids
+    rate: float = 20.0
+    # Random variation of the gap between messages, as a fraction of it
+    jitter: float = 0.0
+    # Probability that a message changes from the last time it was sent
+    change: float = 0.1
+    # Probability that a frame is damaged on the way
+    corrupt: float = 0.0
+    # Mean seconds until the gateway drops a client. 0 never drops.
+    disconnect_after: float = 0.0
+    # Probability that a frame dribbles out a few bytes at a time, and the
+    # seconds between the bytes
+    slow_loris: float = 0.0
+    slow_loris_delay: float = 0.5
+    # Real gateways only accept one client
+    max_clients: int = 1
+
+
+class BusSimulator:
+    """TCP server that writes KWB frames to every connected client."""
+
+    def __init__(self, config: SimulatorConfig, payload_sizes: dict[int, int]):
+        self.config = config
+        self.payload_sizes = payload_sizes
+        self.rng = random.Random()
+        self.clients = 0
+        self.frames_sent = 0
+        self.frames_corrupted = 0
+        self.disconnects = 0
+        self._server: asyncio.Server | None = None
+        self._payloads: dict[int, bytes] = {}
+        self._handlers: set[asyncio.Task] = set()
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving and return the port. Port 0 picks a free one."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def async_stop(self):
+        """Stop serving and drop every client."""
+        if self._server:
+            self._server.close()
+            self._server = None
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def next_frame(self, message_id: int, counter: int) -> bytes:
+        """Build the next frame of a message id, mostly repeating the last one."""
+        payload = self._payloads.get(message_id)
+        if payload is None or self.rng.random() < self.config.change:
+            size = self.payload_sizes.get(message_id, DEFAULT_PAYLOAD_SIZE)
+            payload = self.rng.randbytes(size)
+            self._payloads[message_id] = payload
+        frame = encode_frame(message_id, counter % 256, payload)
+
+        if self.rng.random() < self.config.corrupt:
+            damaged = bytearray(frame)
+            damaged[self.rng.randrange(2, len(damaged))] ^= 1 << self.rng.randrange(8)
+            frame = bytes(damaged)
+            self.frames_corrupted += 1
+
+        return frame
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.clients >= self.config.max_clients:
+            writer.close()
+            return
+
+        config = self.config
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        # Notice a client hanging up even while nothing is written
+        watcher = loop.create_task(self._async_watch(reader, task))
+        self.clients += 1
+        disconnect_at = (
+            loop.time() + self.rng.expovariate(1 / config.disconnect_after)
+            if config.disconnect_after
+            else None
+        )
+        gap = 1 / config.rate
+        counter = 0
+        try:
+            while disconnect_at is None or loop.time() < disconnect_at:
+                for message_id in config.message_ids:
+                    frame = self.next_frame(message_id, counter)
+                    if self.rng.random() < config.slow_loris:
+                        for position in range(0, len(frame), 3):
+                            writer.write(frame[position : position + 3])
+                            await writer.drain()
+                            await asyncio.sleep(config.slow_loris_delay)
+                    else:
+                        writer.write(frame)
+                        await writer.drain()
+                    self.frames_sent += 1
+                    await asyncio.sleep(
+                        max(gap * (1 + self.rng.uniform(-1, 1) * config.jitter), 0)
+                    )
+                counter += 1
+            self.disconnects += 1
+            logger.info("Dropping client after %s frames", self.frames_sent)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            watcher.cancel()
+            self._handlers.discard(task)
+            self.clients -= 1
+            writer.close()
+
+    async def _async_watch(self, reader: asyncio.StreamReader, task: asyncio.Task):
+        while await reader.read(1024):
+            pass
+        task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--sender", default="comfort_3")
+    parser.add_argument("--message-ids", default="32,33,64,65")
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--change", type=float, default=0.1)
+    parser.add_argument("--corrupt", type=float, default=0.0)
+    parser.add_argument("--disconnect-after", type=float, default=0.0)
+    parser.add_argument("--slow-loris", type=float, default=0.0)
+    parser.add_argument("--slow-loris-delay", type=float, default=0.5)
+    parser.add_argument("--max-clients", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = SimulatorConfig(
+        message_ids=tuple(
+            int(message_id) for message_id in args.message_ids.split(",")
+        ),
+        rate=args.rate,
+        jitter=args.jitter,
+        change=args.change,
+        corrupt=args.corrupt,
+        disconnect_after=args.disconnect_after,
+        slow_loris=args.slow_loris,
+        slow_loris_delay=args.slow_loris_delay,
+        max_clients=args.max_clients,
+    )
+    signal_map = load_signal_map(args.sender)
+    payload_sizes = {
+        message_id: decoder.payload_size
+        for message_id, decoder in signal_map.decoders.items()
+    }
+
+    async def serve():
+        simulator = BusSimulator(config, payload_sizes)
+        port = await simulator.async_start(args.host, args.port)
+        logger.info("Simulating %s on %s:%s", args.sender, args.host, port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@
 
 from datetime import timedelta
 import logging
-import time
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -10,37 +9,54 @@ from homeassistant.const import (
     CONF_MODEL,
     CONF_PORT,
     CONF_PROTOCOL,
+    CONF_SENDER,
     CONF_TIMEOUT,
     CONF_UNIQUE_ID,
+    EVENT_HOMEASSISTANT_STOP,
     Platform,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers import device_registry
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import slugify
 
 from .config_flow import options_update_listener
 from .const import (
     CONF_BOILER_EFFICIENCY,
     CONF_BOILER_NOMINAL_POWER,
+    CONF_CAPTURE_PATH,
+    CONF_MAX_INTEGRATION_GAP,
     CONF_PELLET_NOMINAL_ENERGY,
+    CONF_PERSISTENT_CONNECTION,
+    CONF_PUBLISH_INTERVALS,
+    CONF_PUSH_UPDATES,
+    CONF_SCAN_INTERVAL_ACTIVE,
+    CONF_SCAN_INTERVAL_IDLE,
+    DEFAULT_MAX_INTEGRATION_GAP,
+    DEFAULT_PERSISTENT_CONNECTION,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_ACTIVE,
     DOMAIN,
     OPT_LAST_BOILER_RUN_TIME,
     OPT_LAST_ENERGY_OUTPUT,
+    OPT_LAST_PELLET_BUCKETS,
     OPT_LAST_PELLET_CONSUMPTION,
     OPT_LAST_TIMESTAMP,
+    STREAM_STALE_AFTER,
 )
-from .coordinator import data_updater
-from .src.impl.appliance import connect_appliance
+from .coordinator import Coordinator, parse_publish_intervals
+from .src.impl.appliance import Appliance
+from .src.impl.bus.connections import async_get_connection_manager
+from .src.impl.bus.signal_map import async_get_signal_map
+from .src.impl.counters import CounterStore, SnapshotStore
+from .src.impl.handoff import async_take_appliance
+from .services import async_setup_services
+from .src.impl.statistics import StatisticsWriter
 
 logger = logging.getLogger(__name__)
 
 
 PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR]
-SCAN_INTERVAL_SEC = 10
-
-# HomeAssistant reads this for entities with async_update() (?)
-SCAN_INTERVAL = timedelta(seconds=SCAN_INTERVAL_SEC)
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> True:
@@ -60,71 +76,141 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
         CONF_TIMEOUT: int(config_entry.data.get(CONF_TIMEOUT, 2)),
         CONF_MODEL: config_entry.data.get(CONF_MODEL),
         CONF_PROTOCOL: config_entry.data.get(CONF_PROTOCOL),
+        CONF_SENDER: config_entry.data.get(CONF_SENDER),
         CONF_BOILER_EFFICIENCY: config_entry.data.get(CONF_BOILER_EFFICIENCY),
         CONF_BOILER_NOMINAL_POWER: config_entry.data.get(CONF_BOILER_NOMINAL_POWER),
         CONF_PELLET_NOMINAL_ENERGY: config_entry.data.get(CONF_PELLET_NOMINAL_ENERGY),
+        CONF_PERSISTENT_CONNECTION: config_entry.options.get(
+            CONF_PERSISTENT_CONNECTION,
+            config_entry.data.get(
+                CONF_PERSISTENT_CONNECTION, DEFAULT_PERSISTENT_CONNECTION
+            ),
+        ),
+        CONF_MAX_INTEGRATION_GAP: config_entry.options.get(
+            CONF_MAX_INTEGRATION_GAP,
+            config_entry.data.get(
+                CONF_MAX_INTEGRATION_GAP, DEFAULT_MAX_INTEGRATION_GAP
+            ),
+        ),
     }
-    # HACK remove hardcoded sensor names
-    # TODO we need to somehow recover the last boiler_run_time, energy_output and pellet_consumption sensor values
-    # They should be fed to the KWBHeater constructor (?)
-    # FIXME these sensors need to be prefixed with {model}_{unique_id}_
-    sensor_boiler_run_time = hass.states.get("sensor.boiler_run_time")
-    sensor_energy_output = hass.states.get("sensor.energy_output")
-    sensor_pellet_consumption = hass.states.get("sensor.pellet_consumption")
-    sensor_last_timestamp = hass.states.get("sensor.last_timestamp")
-    last_boiler_run_time = (
-        float(sensor_boiler_run_time.state) if sensor_boiler_run_time else 0.0
-    )
-    last_energy_output = (
-        float(sensor_energy_output.state) if sensor_energy_output else 0.0
-    )
-    last_pellet_consumption = (
-        float(sensor_pellet_consumption.state) if sensor_pellet_consumption else 0.0
-    )
-    last_timestamp = (
-        float(sensor_last_timestamp.state)
-        if sensor_last_timestamp
-        else time.time_ns() / 1000000
+    capture_path = config_entry.options.get(
+        CONF_CAPTURE_PATH, config_entry.data.get(CONF_CAPTURE_PATH)
     )
+    if capture_path:
+        # Relative paths are relative to the Home Assistant config directory
+        config_heater[CONF_CAPTURE_PATH] = hass.config.path(capture_path)
+    # Lifetime counters are checkpointed in .storage, so they survive
+    # restarts and entity renames
+    counter_store = CounterStore(hass, slugify(unique_device_id))
+    counters = await counter_store.async_load()
     config_heater.update(
         {
-            OPT_LAST_TIMESTAMP: last_timestamp,
-            OPT_LAST_BOILER_RUN_TIME: last_boiler_run_time,
-            OPT_LAST_ENERGY_OUTPUT: last_energy_output,
-            OPT_LAST_PELLET_CONSUMPTION: last_pellet_consumption,
+            OPT_LAST_TIMESTAMP: counters.get("last_timestamp"),
+            OPT_LAST_BOILER_RUN_TIME: counters.get("boiler_run_time", 0.0),
+            OPT_LAST_ENERGY_OUTPUT: counters.get("boiler_energy", 0.0),
+            OPT_LAST_PELLET_CONSUMPTION: counters.get("pellet_consumption", 0.0),
+            OPT_LAST_PELLET_BUCKETS: counters.get("pellet_buckets"),
         }
     )
 
-    # Async construct heater object
-    # Make sure we can connect to the heater
-    is_success, heater_or_exception = await hass.async_add_executor_job(
-        connect_appliance(config_heater)
+    # Signal maps are shared by all entries and platforms, and survive reloads
+    signal_map = await async_get_signal_map(
+        hass, config_heater[CONF_MODEL], config_heater[CONF_SENDER]
     )
-    if not is_success:
-        logger.error("Failed to connect to heater", exc_info=heater_or_exception)
-        # return False
-        raise ConfigEntryNotReady("Failed to connect to heater")
 
-    # Configure DataUpdateCoordinator
-    async def data_update_method():
-        # return await hass.async_add_executor_job(data_updater(heater_or_exception))
-        return data_updater(heater_or_exception)()
+    # Construct heater object. It is first reached by the background
+    # refresh below, so a slow or unreachable heater doesn't hold up startup.
+    # Persistent connections of all entries are run by one shared manager
+    connections = async_get_connection_manager(hass)
+    heater = Appliance(config_heater, signal_map, connections, hass)
+    snapshot_store = SnapshotStore(hass, slugify(unique_device_id))
+    # A heater that was just added has been read by the config flow already
+    validated = async_take_appliance(
+        hass, unique_device_id, config_heater[CONF_HOST], config_heater[CONF_PORT]
+    )
+    if validated is not None:
+        heater.adopt(validated)
+    else:
+        # Entities start with the values last seen, until the heater answers
+        heater.restore_snapshot(await snapshot_store.async_load())
+
+    # Push messages to entities as they arrive. Needs a persistent connection.
+    push = config_heater[CONF_PERSISTENT_CONNECTION] and config_entry.options.get(
+        CONF_PUSH_UPDATES,
+        config_entry.data.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES),
+    )
+    publish_intervals = parse_publish_intervals(
+        config_entry.options.get(
+            CONF_PUBLISH_INTERVALS, config_entry.data.get(CONF_PUBLISH_INTERVALS)
+        )
+    )
+
+    # Refresh fast while the boiler is active and slowly while it idles
+    scan_intervals = (
+        timedelta(
+            seconds=config_entry.options.get(
+                CONF_SCAN_INTERVAL_ACTIVE,
+                config_entry.data.get(
+                    CONF_SCAN_INTERVAL_ACTIVE, DEFAULT_SCAN_INTERVAL_ACTIVE
+                ),
+            )
+        ),
+        timedelta(
+            seconds=config_entry.options.get(
+                CONF_SCAN_INTERVAL_IDLE,
+                config_entry.data.get(CONF_SCAN_INTERVAL_IDLE, DEFAULT_SCAN_INTERVAL),
+            )
+        ),
+    )
 
-    # TODO move this to __init__.py
     # Create a data update coordinator
-    coordinator = DataUpdateCoordinator(
+    coordinator = Coordinator(
+        hass,
+        heater,
+        # When pushing, polling only checks that the stream is still alive
+        update_interval=(
+            timedelta(seconds=STREAM_STALE_AFTER) if push else scan_intervals[0]
+        ),
+        push=push,
+        publish_intervals=publish_intervals,
+        phase=connections.phase(heater.unique_key),
+        scan_intervals=scan_intervals,
+    )
+    # Entities read the heater before the first refresh finished
+    coordinator.data = heater
+
+    # Checkpoint counters and values whenever entities were updated
+    counter_store.attach(heater.counters)
+    coordinator.async_add_listener(counter_store.async_schedule_save)
+    snapshot_store.attach(heater.snapshot_data)
+    coordinator.async_add_listener(snapshot_store.async_schedule_save)
+    # Hourly long-term statistics of the counters, for the Energy dashboard
+    statistics = StatisticsWriter(
         hass,
-        logger,
-        name=DOMAIN,
-        update_method=data_update_method,
-        update_interval=SCAN_INTERVAL,
+        slugify(unique_device_id),
+        f"KWB {config_entry.data.get(CONF_MODEL)} {unique_device_id}",
+    )
+    await statistics.async_load()
+    statistics.attach(lambda: heater.live_values)
+    coordinator.async_add_listener(statistics.async_update)
+
+    @callback
+    def async_flush_statistics(event: Event) -> None:
+        # Unloading is skipped on shutdown, so write the hour in progress
+        # while the recorder still takes it
+        statistics.async_flush()
+
+    config_entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_flush_statistics)
     )
-    # and fetch data (at least) once via DataUpdateCoordinator
-    await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = {
         "coordinator": coordinator,
-        "device": heater_or_exception,
+        "device": heater,
+        "signal_map": signal_map,
+        "counters": counter_store,
+        "snapshot": snapshot_store,
+        "statistics": statistics,
     }
 
     # We can't add CONF_UNIQUE_ID here or we get an error in the device registry
@@ -147,14 +233,10 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
         **device_info,
     )
 
-    # Register options update handler
-    # hass_data = dict(config_entry.data)
-    # Registers update listener to update config entry when options are updated.
-    # unsub_options_update_listener = config_entry.add_update_listener(options_update_listener)
-    # Store a reference to the unsubscribe function to cleanup if an entry is unloaded.
-    # hass_data["unsub_options_update_listener"] = unsub_options_update_listener
-    # hass.data[DOMAIN][config_entry.entry_id] = hass_data
-    config_entry.add_update_listener(options_update_listener)
+    # Reload with the new options when they change, until the entry unloads
+    config_entry.async_on_unload(
+        config_entry.add_update_listener(options_update_listener)
+    )
 
     # Forward the setup to the sensor platform.
     # hass.async_create_task(
@@ -163,11 +245,35 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
     # )
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    async_setup_services(hass)
+
+    if validated is not None and (not heater.persistent or heater in connections):
+        # Values are fresh, and a persistent stream was handed over, so the
+        # first refresh can wait for its interval
+        coordinator.async_set_updated_data(heater)
+    else:
+        # Fetch data once via DataUpdateCoordinator, without holding up startup
+        config_entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            f"{DOMAIN}_{unique_device_id}_first_refresh",
+        )
 
     return True
 
 
-# TODO Unload gracefully
-# https://github.com/home-assistant/core/blob/dev/homeassistant/components/fronius/__init__.py
-# async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-#   ...
+async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    """Unload platforms and close the connection to the heater"""
+
+    if not await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS):
+        return False
+
+    entry_data = hass.data[DOMAIN].pop(config_entry.entry_id)
+    await entry_data["coordinator"].async_shutdown()
+    # Gateways only accept one client, so release it before a reload reconnects
+    await entry_data["device"].async_stop_streaming()
+    await entry_data["counters"].async_flush()
+    await entry_data["snapshot"].async_flush()
+    entry_data["statistics"].async_flush()
+
+    return True
@@ -22,9 +22,8 @@ async def async_setup_entry(
 ) -> None:
     """Initialize config entry."""
 
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id].get(
-        "coordinator"
-    )
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator: DataUpdateCoordinator = entry_data.get("coordinator")
 
     unique_device_id = config_entry.data.get(CONF_UNIQUE_ID)
     model = config_entry.data.get(CONF_MODEL)
@@ -40,7 +39,10 @@ async def async_setup_entry(
 
     async_add_entities(
         setup_entities(
-            coordinator=coordinator, config_entry=config_entry, device_info=device_info
+            coordinator=coordinator,
+            config_entry=config_entry,
+            device_info=device_info,
+            signal_map=entry_data.get("signal_map"),
         ),
         update_before_add=True,
     )
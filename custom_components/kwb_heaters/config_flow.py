@@ -28,11 +28,28 @@ from homeassistant.helpers.selector import SelectSelector, SelectSelectorConfig
 from .const import (
     CONF_BOILER_EFFICIENCY,
     CONF_BOILER_NOMINAL_POWER,
+    CONF_CAPTURE_PATH,
+    CONF_MAX_INTEGRATION_GAP,
     CONF_PELLET_NOMINAL_ENERGY,
+    CONF_PERSISTENT_CONNECTION,
+    CONF_PUBLISH_INTERVALS,
+    CONF_PUSH_UPDATES,
+    CONF_SCAN_INTERVAL_ACTIVE,
+    CONF_SCAN_INTERVAL_IDLE,
+    DEFAULT_MAX_INTEGRATION_GAP,
     DEFAULT_NAME,
+    DEFAULT_PERSISTENT_CONNECTION,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_ACTIVE,
     DOMAIN,
+    MIN_SCAN_INTERVAL,
 )
-from .src.impl.appliance import connect_appliance
+from .coordinator import parse_publish_intervals
+from .src.impl.appliance import Appliance, async_connect_appliance
+from .src.impl.bus.connections import async_get_connection_manager
+from .src.impl.bus.signal_map import async_get_signal_map
+from .src.impl.handoff import async_offer_appliance, async_take_appliance
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +67,21 @@ def data_schema(defaults: dict):
     conf_boiler_efficiency = defaults.get(CONF_BOILER_EFFICIENCY, 90.0)
     conf_boiler_nominal_power = defaults.get(CONF_BOILER_NOMINAL_POWER)
     conf_pellet_nominal_energy = defaults.get(CONF_PELLET_NOMINAL_ENERGY)
+    conf_persistent_connection = defaults.get(
+        CONF_PERSISTENT_CONNECTION, DEFAULT_PERSISTENT_CONNECTION
+    )
+    conf_push_updates = defaults.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES)
+    conf_publish_intervals = defaults.get(CONF_PUBLISH_INTERVALS, "")
+    conf_max_integration_gap = defaults.get(
+        CONF_MAX_INTEGRATION_GAP, DEFAULT_MAX_INTEGRATION_GAP
+    )
+    conf_capture_path = defaults.get(CONF_CAPTURE_PATH, "")
+    conf_scan_interval_active = defaults.get(
+        CONF_SCAN_INTERVAL_ACTIVE, DEFAULT_SCAN_INTERVAL_ACTIVE
+    )
+    conf_scan_interval_idle = defaults.get(
+        CONF_SCAN_INTERVAL_IDLE, DEFAULT_SCAN_INTERVAL
+    )
     # Load up existing sensor values
     # sensor_boiler_run_time = defaults.get("boiler_run_time")
     # sensor_energy_output = defaults.get("boiler_energy")
@@ -91,6 +123,21 @@ def data_schema(defaults: dict):
             vol.Optional(
                 CONF_PELLET_NOMINAL_ENERGY, default=conf_pellet_nominal_energy
             ): float,
+            vol.Optional(
+                CONF_PERSISTENT_CONNECTION, default=conf_persistent_connection
+            ): bool,
+            vol.Optional(CONF_PUSH_UPDATES, default=conf_push_updates): bool,
+            vol.Optional(CONF_PUBLISH_INTERVALS, default=conf_publish_intervals): str,
+            vol.Optional(
+                CONF_SCAN_INTERVAL_ACTIVE, default=conf_scan_interval_active
+            ): vol.All(int, vol.Range(min=MIN_SCAN_INTERVAL)),
+            vol.Optional(
+                CONF_SCAN_INTERVAL_IDLE, default=conf_scan_interval_idle
+            ): vol.All(int, vol.Range(min=MIN_SCAN_INTERVAL)),
+            vol.Optional(
+                CONF_MAX_INTEGRATION_GAP, default=conf_max_integration_gap
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(CONF_CAPTURE_PATH, default=conf_capture_path): str,
             # vol.Optional(OPT_LAST_BOILER_RUN_TIME, default=last_boiler_run_time): float,
             # vol.Optional(OPT_LAST_ENERGY_OUTPUT, default=last_energy_output): float,
             # vol.Optional(
@@ -103,6 +150,20 @@ def data_schema(defaults: dict):
     return schema
 
 
+def validate_intervals(user_input: dict) -> dict[str, str]:
+    """Return errors for publish and scan intervals that make no sense."""
+    errors = {}
+    try:
+        parse_publish_intervals(user_input.get(CONF_PUBLISH_INTERVALS))
+    except ValueError:
+        errors[CONF_PUBLISH_INTERVALS] = "invalid_publish_intervals"
+    if user_input.get(
+        CONF_SCAN_INTERVAL_ACTIVE, DEFAULT_SCAN_INTERVAL_ACTIVE
+    ) > user_input.get(CONF_SCAN_INTERVAL_IDLE, DEFAULT_SCAN_INTERVAL):
+        errors[CONF_SCAN_INTERVAL_IDLE] = "invalid_scan_intervals"
+    return errors
+
+
 class KWBConfigFlow(ConfigFlow, domain=DOMAIN):
     """KWB config flow."""
 
@@ -122,13 +183,44 @@ class KWBConfigFlow(ConfigFlow, domain=DOMAIN):
         if not user_input:
             return None
 
+        if errors := validate_intervals(user_input):
+            return (errors, None)
+
+        # An earlier validation of this heater may still hold the gateway
+        if previous := async_take_appliance(
+            hass,
+            user_input.get(CONF_UNIQUE_ID),
+            user_input.get(CONF_HOST),
+            user_input.get(CONF_PORT),
+        ):
+            await previous.async_stop_streaming()
+
         # Validate the data can be used to set up a connection.
-        is_success, heater = await hass.async_add_executor_job(
-            connect_appliance(user_input)
+        signal_map = await async_get_signal_map(
+            hass, user_input.get(CONF_MODEL), user_input.get(CONF_SENDER)
+        )
+        # A persistent connection is opened by the shared connection manager,
+        # so setup can take it over as it is
+        persistent = user_input.get(
+            CONF_PERSISTENT_CONNECTION, DEFAULT_PERSISTENT_CONNECTION
+        )
+        # Only the config entry records the bus
+        is_success, heater = await async_connect_appliance(
+            {**user_input, CONF_CAPTURE_PATH: None},
+            signal_map,
+            async_get_connection_manager(hass) if persistent else None,
+            hass,
         )
         # If we can't connect, set a value indicating this so we can tell the user
         if not is_success:
             errors["base"] = "cannot_connect"
+            # Release the gateway, so the form can be submitted again
+            if isinstance(heater, Appliance):
+                await heater.async_stop_streaming()
+        else:
+            # Setup adopts what was just read, and the open stream, instead
+            # of reading it again
+            async_offer_appliance(hass, heater)
 
         return (errors, heater)
 
@@ -143,18 +235,20 @@ class KWBConfigFlow(ConfigFlow, domain=DOMAIN):
         else:
             # We got user input, so do something with it
 
+            # Figure out a unique id (that never changes!) for the device.
+            # Checked first, so a heater that is set up already isn't
+            # connected to a second time.
+            unique_device_id = user_input.get(CONF_UNIQUE_ID)
+            await self.async_set_unique_id(unique_device_id)
+            # self._abort_if_unique_id_configured(updates={CONF_HOST: user_input[CONF_HOST]})
+            self._abort_if_unique_id_configured()
+
             # Validate inputs and do a test connection/scrape of the heater
             # Both info and errors are None when config flow is first invoked
             errors, heater = await self.validate_input(self.hass, user_input)
 
             # Either display errors in form, or create config entry and close form
             if not errors or not len(errors.keys()):
-                # Figure out a unique id (that never changes!) for the device
-                unique_device_id = user_input.get(CONF_UNIQUE_ID)
-                await self.async_set_unique_id(unique_device_id)
-                # self._abort_if_unique_id_configured(updates={CONF_HOST: user_input[CONF_HOST]})
-                self._abort_if_unique_id_configured()
-
                 # Create the config entry
                 return self.async_create_entry(title=DEFAULT_NAME, data=user_input)
             else:
@@ -284,7 +378,7 @@ class KWBOptionsFlow(OptionsFlow):
         if user_input is not None:
             # We got user input, so save it
 
-            errors: Dict[str, str] = {}
+            errors: Dict[str, str] = validate_intervals(user_input)
 
             if not errors:
                 return self.async_create_entry(title=DEFAULT_NAME, data=user_input)
@@ -9,6 +9,9 @@ MANUFACTURER = "KWB"
 DEFAULT_PORT = 502
 DEFAULT_SLAVE = 0x01
 DEFAULT_SCAN_INTERVAL = 60
+# Seconds between refreshes while the boiler is active
+DEFAULT_SCAN_INTERVAL_ACTIVE = 5
+MIN_SCAN_INTERVAL = 2
 DEFAULT_TIMEOUT = 3
 
 MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=10)
@@ -16,7 +19,61 @@ MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=10)
 CONF_PELLET_NOMINAL_ENERGY = "pellet_nominal_energy_kWh_kg"
 CONF_BOILER_EFFICIENCY = "boiler_efficiency"
 CONF_BOILER_NOMINAL_POWER = "boiler_nominal_power_kW"
+# hass.data[DOMAIN] key of the signal maps shared by all config entries
+DATA_SIGNAL_MAPS = "signal_maps"
+# hass.data[DOMAIN] key of the connection manager shared by all config entries
+DATA_CONNECTIONS = "connections"
+# hass.data[DOMAIN] key of appliances validated by the config flow
+DATA_HANDOFF = "handoff"
+# Seconds setup can adopt an appliance validated by the config flow
+HANDOFF_TTL = 60
+
 OPT_LAST_BOILER_RUN_TIME = "last_boiler_run_time"
 OPT_LAST_ENERGY_OUTPUT = "last_energy_output"
 OPT_LAST_PELLET_CONSUMPTION = "last_pellet_consumption"
+OPT_LAST_PELLET_BUCKETS = "last_pellet_buckets"
 OPT_LAST_TIMESTAMP = "last_timestamp"
+CONF_PERSISTENT_CONNECTION = "persistent_connection"
+CONF_PUSH_UPDATES = "push_updates"
+CONF_PUBLISH_INTERVALS = "publish_intervals"
+CONF_CAPTURE_PATH = "capture_path"
+CONF_SCAN_INTERVAL_ACTIVE = "scan_interval_active"
+CONF_SCAN_INTERVAL_IDLE = "scan_interval_idle"
+CONF_MAX_INTEGRATION_GAP = "max_integration_gap"
+
+DEFAULT_PERSISTENT_CONNECTION = True
+# Seconds to wait before reconnecting a dropped persistent connection
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+# Seconds without a decoded message before a persistent connection is stale
+STREAM_STALE_AFTER = 30
+# Seconds a blocking call on the worker thread of a heater may take
+BLOCKING_IO_TIMEOUT = 10
+# Diagnostic state attribute with the seconds since a signal was received
+ATTR_SIGNAL_AGE = "signal_age"
+# Bus cycles a message can be missing before its signals become unavailable
+STALE_AFTER_CYCLES = 3
+# Seconds a message is always considered fresh for, however fast it repeats
+MIN_STALE_AFTER = 5
+# Scrapes a late message id is not waited for. Less than STALE_AFTER_CYCLES,
+# so it is read again before its signals become unavailable.
+LATE_RETRY_SCRAPES = STALE_AFTER_CYCLES - 1
+DEFAULT_PUSH_UPDATES = True
+# Seconds between two pushes of the same message id, unless configured
+DEFAULT_MIN_PUBLISH_INTERVAL = 1
+# Raw bus capture files rotate at this size and keep this many old files
+CAPTURE_MAX_BYTES = 64 * 1024 * 1024
+CAPTURE_BACKUP_COUNT = 4
+# Buffered capture bytes that trigger a write to disk
+CAPTURE_FLUSH_SIZE = 64 * 1024
+# Binary signals whose key contains one of these make the boiler count as
+# active, like boiler_on does
+ACTIVE_SIGNAL_PATTERNS = ("ignition", "alarm")
+# Seconds the last boiler output sample is integrated for at most, after
+# it was received
+DEFAULT_MAX_INTEGRATION_GAP = 120
+# Seconds to collect counter changes before writing them to .storage
+COUNTER_SAVE_DELAY = 60
+# Service importing the statistics CSV of bench/backfill.py
+SERVICE_IMPORT_STATISTICS = "import_statistics"
+ATTR_FILE_PATH = "file_path"
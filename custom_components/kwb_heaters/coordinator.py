@@ -1,24 +1,37 @@
+from collections.abc import Callable, Iterable, Mapping
+from datetime import datetime, timedelta
+from functools import partial
 import logging
+import time
 
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .const import ACTIVE_SIGNAL_PATTERNS, DEFAULT_MIN_PUBLISH_INTERVAL, DOMAIN
 from .src.impl.appliance import Appliance
 
 logger = logging.getLogger(__name__)
 
+# Stands in for a key that has no value yet
+_MISSING = object()
+# Seconds a refresh may start off its phase before the next one is moved
+# back onto it. The base class schedules refreshes on whole seconds.
+PHASE_TOLERANCE = 1
+
 
 def data_updater(appliance: Appliance):
     """Function called by DataUpdateCoordinator to do the data refresh from the heater"""
 
-    def u():
+    async def u():
         try:
-            is_success = appliance.scrape()
+            is_success = await appliance.async_scrape()
             logger.debug("data_updater is_success=%s", is_success)
         except Exception as e:
             logger.error("Failed scraping KWB heater", exc_info=e)
             raise UpdateFailed("Failed scraping KWB heater")
 
-        if not is_success or appliance.latest_scrape == {}:
+        if not is_success or not appliance.latest_scrape:
             logger.error("Failed scraping KWB heater")
             raise UpdateFailed("Failed scraping KWB heater")
 
@@ -27,10 +40,318 @@ def data_updater(appliance: Appliance):
     return u
 
 
+def parse_publish_intervals(text: str | None) -> dict[int, float]:
+    """Parse "32=1, 64=10" into {32: 1.0, 64: 10.0}.
+
+    Raises ValueError if text is malformed.
+    """
+    intervals = {}
+    for item in (text or "").split(","):
+        if not item.strip():
+            continue
+        message_id, interval = item.split("=")
+        intervals[int(message_id)] = float(interval)
+    return intervals
+
+
 class Coordinator(DataUpdateCoordinator):
-    async def _async_update_data(self):
-        """Data update coordinator implementation.
+    """Coordinator that only updates entities whose value changed.
+
+    Entities register with their key as listener context. After every
+    refresh the appliance values are compared to what was last dispatched,
+    and only the listeners of changed keys are called. Binary signals are
+    compared as one bitset per message id. A refresh that finds the snapshot
+    generation of the last full comparison only compares the live values,
+    like energy. In push mode each decoded message is diffed the same way,
+    at most once per publish interval of its message id.
+
+    With scan_intervals (active, idle) the coordinator refreshes at the
+    active interval while the boiler runs, ignites or signals an alarm, and
+    at the idle interval otherwise. In push mode the idle interval is the
+    minimum publish interval instead.
+
+    Refreshes start at phase, a fraction of the interval, so heaters do not
+    all refresh at once. A refresh that started off its phase, because the
+    interval changed or it drifted, moves the next one back onto it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        appliance: Appliance,
+        update_interval: timedelta,
+        push: bool = False,
+        publish_intervals: dict[int, float] | None = None,
+        phase: float = 0.0,
+        scan_intervals: tuple[timedelta, timedelta] | None = None,
+    ):
+        super().__init__(
+            hass,
+            logger,
+            name=DOMAIN,
+            # Scraping is async, so it neither blocks the loop nor needs an executor
+            update_method=data_updater(appliance),
+            update_interval=update_interval,
+        )
+        self.appliance = appliance
+        self.push = push
+        self.publish_intervals = publish_intervals or {}
+        # Fraction of the update interval to offset refreshes by, so that
+        # heaters do not all refresh at once
+        self.phase = phase
+        self.scan_intervals = scan_intervals
+        self._base_interval = update_interval
+
+        # Keys that make the boiler count as active
+        self._active_keys = ("boiler_on",) + tuple(
+            key
+            for key in appliance.signal_map.bit_positions
+            if any(pattern in key for pattern in ACTIVE_SIGNAL_PATTERNS)
+        )
+        self._active = False
+
+        # Change detection state
+        self._key_listeners: dict[str | None, list[CALLBACK_TYPE]] = {}
+        self._dispatched: dict[str, object] = {}
+        self._dispatched_bits: dict[int, int] = {}
+        self._dispatched_success: bool | None = None
+        # Snapshot generation that was last compared in full
+        self._dispatched_generation: int | None = None
+        # Message ids whose signals were dispatched as stale
+        self._stale_ids: set[int] = set()
+
+        # Push state per message id
+        self._last_publish: dict[int, float] = {}
+        self._pending_keys: dict[int, set[str]] = {}
+        self._unsub_publish: dict[int, CALLBACK_TYPE] = {}
 
-        This is the place to pre-process the data to lookup tables
-        so entities can quickly look up their data.
+        if push:
+            appliance.message_listener = self.async_handle_message
+        if update_interval and not appliance.persistent:
+            # Messages only arrive when polled
+            appliance.poll_interval = update_interval.total_seconds()
+
+    @callback
+    def async_handle_message(self, message_id: int, keys: Iterable[str]) -> None:
+        """Publish a decoded message, or defer it until its interval has passed."""
+        self._pending_keys.setdefault(message_id, set()).update(keys)
+        interval = self.publish_intervals.get(message_id, DEFAULT_MIN_PUBLISH_INTERVAL)
+        if self.scan_intervals:
+            active = self.active
+            if active and not self._active:
+                # Don't sit on messages deferred while idle
+                for deferred_id in list(self._unsub_publish):
+                    self._unsub_publish.pop(deferred_id)()
+                    self._async_publish(deferred_id)
+            self._active = active
+            if not active:
+                interval = max(interval, self.scan_intervals[1].total_seconds())
+
+        if message_id in self._unsub_publish:
+            # Already scheduled. It will pick up these keys too
+            return
+        if not self._pending_keys.get(message_id):
+            return
+
+        last_publish = self._last_publish.get(message_id)
+        wait = 0 if last_publish is None else last_publish + interval - time.monotonic()
+        if wait > 0:
+            self._unsub_publish[message_id] = async_call_later(
+                self.hass, wait, partial(self._async_publish, message_id)
+            )
+            return
+
+        self._async_publish(message_id)
+
+    @property
+    def active(self) -> bool:
+        """Return True while the boiler runs, ignites or signals an alarm."""
+        is_on = self.appliance.is_on
+        return any(is_on(key) for key in self._active_keys)
+
+    async def _async_update_data(self) -> Appliance:
+        """Refresh, then pick the next update interval from the boiler state.
+
+        The base class schedules the next refresh with update_interval.
         """
+        started = self.hass.loop.time()
+        try:
+            return await super()._async_update_data()
+        finally:
+            interval = self._base_interval
+            if self.scan_intervals and not self.push:
+                active_interval, idle_interval = self.scan_intervals
+                interval = active_interval if self.active else idle_interval
+                if not self.appliance.persistent:
+                    self.appliance.poll_interval = interval.total_seconds()
+            self.update_interval = self._until_phase(interval, started)
+
+    def _until_phase(
+        self, interval: timedelta | None, started: float
+    ) -> timedelta | None:
+        """Return the wait for the next refresh on this coordinator's phase.
+
+        A refresh that started on its phase of interval keeps interval. The
+        base class schedules on whole seconds, so refreshes stay on their
+        phase until the interval changes or one takes a second or longer.
+        """
+        if interval is None:
+            return None
+        seconds = interval.total_seconds()
+        offset = self.phase * seconds
+        error = (started - offset + seconds / 2) % seconds - seconds / 2
+        if abs(error) <= PHASE_TOLERANCE:
+            return interval
+        wait = (offset - self.hass.loop.time()) % seconds
+        if wait < PHASE_TOLERANCE:
+            wait += seconds
+        return timedelta(seconds=wait)
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: str | None = None
+    ) -> Callable[[], None]:
+        """Listen for data updates and index the listener by its key."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        self._key_listeners.setdefault(context, []).append(update_callback)
+
+        @callback
+        def remove_key_listener() -> None:
+            remove_listener()
+            listeners = self._key_listeners[context]
+            listeners.remove(update_callback)
+            if not listeners:
+                del self._key_listeners[context]
+
+        return remove_key_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners of keys that changed since the last dispatch.
+
+        All listeners are updated when availability changed.
+        """
+        appliance = self.appliance
+        snapshot = appliance.snapshot
+        if self.last_update_success != self._dispatched_success:
+            self._dispatched_success = self.last_update_success
+            self._dispatched_generation = snapshot.generation
+            self._dispatched = {**snapshot.values, **appliance.live_values}
+            self._dispatched_bits = dict(snapshot.bits)
+            self._freshness_flipped_keys()
+            super().async_update_listeners()
+            return
+
+        live_keys = appliance.derived.live_keys
+        if snapshot.generation == self._dispatched_generation:
+            # Nothing changed since the last comparison, but time went on
+            self._async_dispatch(
+                self._changed_keys(live_keys) + self._freshness_flipped_keys()
+            )
+            return
+        self._dispatched_generation = snapshot.generation
+
+        keys = snapshot.values.keys() | live_keys | self._dispatched.keys()
+        self._async_dispatch(
+            self._changed_keys(keys)
+            + self._changed_bit_keys(snapshot.bits.keys(), snapshot.bits)
+            + self._freshness_flipped_keys()
+        )
+
+    @callback
+    def async_update_listeners_for(
+        self, keys: Iterable[str], message_ids: Iterable[int] = ()
+    ) -> None:
+        """Update the listeners of changed keys and of flipped binary signals."""
+        self._async_dispatch(
+            self._changed_keys(keys)
+            + self._changed_bit_keys(message_ids)
+            + self._freshness_flipped_keys()
+        )
+
+    async def async_shutdown(self) -> None:
+        """Cancel deferred publishes."""
+        await super().async_shutdown()
+        for unsub in self._unsub_publish.values():
+            unsub()
+        self._unsub_publish.clear()
+        self._pending_keys.clear()
+        self.appliance.message_listener = None
+
+    def _changed_keys(self, keys: Iterable[str]) -> list[str]:
+        """Return the keys whose value differs from the last dispatch."""
+        value_of = self.appliance.value
+        dispatched = self._dispatched
+        changed = []
+        for key in keys:
+            value = value_of(key, _MISSING)
+            if dispatched.get(key, _MISSING) != value:
+                dispatched[key] = value
+                changed.append(key)
+        return changed
+
+    def _freshness_flipped_keys(self) -> list[str]:
+        """Return the keys of messages that went stale or fresh since last dispatch.
+
+        Includes the keys calculated from them.
+        """
+        now = time.monotonic()
+        is_message_fresh = self.appliance.is_message_fresh
+        message_keys = self.appliance.message_keys
+        stale = {
+            message_id
+            for message_id in message_keys
+            if not is_message_fresh(message_id, now)
+        }
+        flipped = stale ^ self._stale_ids
+        self._stale_ids = stale
+        return list(
+            {key: None for message_id in flipped for key in message_keys[message_id]}
+        )
+
+    def _changed_bit_keys(
+        self, message_ids: Iterable[int], latest_bits: Mapping[int, int] | None = None
+    ) -> list[str]:
+        """Return the keys of binary signals that flipped since the last dispatch."""
+        if latest_bits is None:
+            latest_bits = self.appliance.latest_bits
+        decoders = self.appliance.signal_map.decoders
+        changed = []
+        for message_id in message_ids:
+            bits = latest_bits.get(message_id, 0)
+            flipped = bits ^ self._dispatched_bits.get(message_id, 0)
+            if not flipped:
+                continue
+            self._dispatched_bits[message_id] = bits
+            bit_keys = decoders[message_id].bit_keys
+            while flipped:
+                lowest = flipped & -flipped
+                changed.append(bit_keys[lowest.bit_length() - 1])
+                flipped ^= lowest
+        return changed
+
+    @callback
+    def _async_dispatch(self, keys: Iterable[str]) -> None:
+        """Call the listeners of keys, and listeners without a key."""
+        key_listeners = self._key_listeners
+        for key in keys:
+            for update_callback in list(key_listeners.get(key, ())):
+                update_callback()
+        for update_callback in list(key_listeners.get(None, ())):
+            update_callback()
+
+    @callback
+    def _async_publish(self, message_id: int, _now: datetime | None = None) -> None:
+        self._unsub_publish.pop(message_id, None)
+        keys = self._pending_keys.pop(message_id, set())
+        self._last_publish[message_id] = time.monotonic()
+        self.data = self.appliance
+
+        if not self.last_update_success:
+            # Stream recovered before the next refresh noticed. Every entity
+            # has to become available again.
+            self.last_update_success = True
+            self.async_update_listeners()
+            return
+
+        self.async_update_listeners_for(keys, (message_id,))
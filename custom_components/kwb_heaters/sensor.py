@@ -27,9 +27,8 @@ async def async_setup_entry(
     Required by HomeAssistant
     """
     # Retrieve data update coordinator
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id].get(
-        "coordinator"
-    )
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator: DataUpdateCoordinator = entry_data.get("coordinator")
 
     unique_device_id = config_entry.data.get(CONF_UNIQUE_ID)
     model = config_entry.data.get(CONF_MODEL)
@@ -49,7 +48,10 @@ async def async_setup_entry(
     # create_sensors() can return any kind of Iterable.
     async_add_entities(
         setup_entities(
-            device_info=device_info, coordinator=coordinator, config_entry=config_entry
+            device_info=device_info,
+            coordinator=coordinator,
+            config_entry=config_entry,
+            signal_map=entry_data.get("signal_map"),
         ),
         update_before_add=True,
     )
@@ -0,0 +1,44 @@
+"""Services of the KWB heaters integration."""
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from .const import ATTR_FILE_PATH, DOMAIN, SERVICE_IMPORT_STATISTICS
+from .src.impl.statistics import read_statistics_csv
+
+IMPORT_STATISTICS_SCHEMA = vol.Schema({vol.Required(ATTR_FILE_PATH): cv.string})
+
+
+def async_setup_services(hass: HomeAssistant):
+    """Register the services once, for all heaters."""
+    if hass.services.has_service(DOMAIN, SERVICE_IMPORT_STATISTICS):
+        return
+
+    async def async_import_statistics(call: ServiceCall) -> None:
+        """Import the statistics CSV of bench/backfill.py into the recorder."""
+        path = call.data[ATTR_FILE_PATH]
+        if not hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"{path} is not in allowlist_external_dirs")
+        rows = await hass.async_add_executor_job(read_statistics_csv, path)
+        writers = {
+            statistic_id: entry_data["statistics"]
+            for entry_data in hass.data.get(DOMAIN, {}).values()
+            for statistic_id in entry_data["statistics"].statistic_ids
+        }
+        # Check every id before importing any, so a typo imports nothing
+        if unknown := rows.keys() - writers.keys():
+            raise HomeAssistantError(
+                f"No heater writes statistics {', '.join(sorted(unknown))}"
+            )
+        for statistic_id, statistic_rows in rows.items():
+            writers[statistic_id].async_import(statistic_id, statistic_rows)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_STATISTICS,
+        async_import_statistics,
+        schema=IMPORT_STATISTICS_SCHEMA,
+    )
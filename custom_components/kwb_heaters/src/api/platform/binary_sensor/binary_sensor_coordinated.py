@@ -7,6 +7,7 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
 )
 
+from .....const import ATTR_SIGNAL_AGE
 from .binary_sensor import BinarySensor
 from .binary_sensor_description import BinarySensorDescription
 
@@ -16,25 +17,41 @@ logger = logging.getLogger(__name__)
 class CoordinatedBinarySensor(CoordinatorEntity, BinarySensor):
     """Custom binary sensor entity."""
 
+    # Changes with every update, so keep it out of the recorder
+    _unrecorded_attributes = frozenset({ATTR_SIGNAL_AGE})
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
         entity_description: BinarySensorDescription,
         device_info: DeviceInfo,
     ):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=entity_description.key)
 
         unique_device_id = list(device_info.get("identifiers"))[0][1]
 
-        self._attr_available = True
         self._attr_unique_id = f"kwb_{unique_device_id}_{entity_description.key}"
         self._attr_device_info = device_info
 
         self.entity_description = entity_description
 
     @property
-    def is_on(self) -> bool:
-        return bool(self.coordinator.data.latest_scrape[self.entity_description.key])
+    def available(self) -> bool:
+        """Return False if the last update failed or the signal went stale."""
+        return (
+            super().available
+            and self.coordinator.data is not None
+            and self.coordinator.data.is_fresh(self.entity_description.key)
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        age = self.coordinator.data.signal_age(self.entity_description.key)
+        return None if age is None else {ATTR_SIGNAL_AGE: round(age, 1)}
+
+    @property
+    def is_on(self) -> bool | None:
+        return self.coordinator.data.is_on(self.entity_description.key)
 
     # @callback
     # def _handle_coordinator_update(self) -> None:
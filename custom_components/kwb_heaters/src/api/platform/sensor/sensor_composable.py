@@ -72,7 +72,7 @@ class ComposableSensor(CoordinatorEntity, RestoreSensor):
 
         # You must super().__init__(coordinator) in this method in order for
         # polling to work.
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=entity_description.key)
 
         # Log warnings if configuration seems odd
         if entity_description.coordinated and not coordinator:
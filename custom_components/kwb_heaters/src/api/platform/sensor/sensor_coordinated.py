@@ -8,7 +8,7 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
 )
 
-from .....const import DOMAIN, MANUFACTURER
+from .....const import ATTR_SIGNAL_AGE, DOMAIN, MANUFACTURER
 from .sensor import Sensor
 from .sensor_description import SensorDescription
 
@@ -18,6 +18,9 @@ logger = logging.getLogger(__name__)
 class CoordinatedSensor(CoordinatorEntity, Sensor):
     """Sensor that is updated by DataUpdateCoordinator."""
 
+    # Changes with every update, so keep it out of the recorder
+    _unrecorded_attributes = frozenset({ATTR_SIGNAL_AGE})
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
@@ -29,11 +32,12 @@ class CoordinatedSensor(CoordinatorEntity, Sensor):
         You must super().__init__(coordinator) in this method in order for
         polling to work.
         """
-        super().__init__(coordinator)
+        # Key is the listener context, so pushed messages only update
+        # the sensors they carry values for
+        super().__init__(coordinator, context=description.key)
 
         unique_device_id = list(device_info.get("identifiers"))[0][1]
 
-        self._attr_available = True
         self._attr_unique_id = f"kwb_{unique_device_id}_{description.key}"
         self._attr_device_info = device_info
 
@@ -41,6 +45,20 @@ class CoordinatedSensor(CoordinatorEntity, Sensor):
         # values from entity_description
         self.entity_description = description
 
+    @property
+    def available(self) -> bool:
+        """Return False if the last update failed or the signal went stale."""
+        return (
+            super().available
+            and self.coordinator.data is not None
+            and self.coordinator.data.is_fresh(self.entity_description.key)
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        age = self.coordinator.data.signal_age(self.entity_description.key)
+        return None if age is None else {ATTR_SIGNAL_AGE: round(age, 1)}
+
     @property
     def native_value(self):
         """Return the native value of the sensor based on the last data poll.
@@ -48,7 +66,7 @@ class CoordinatedSensor(CoordinatorEntity, Sensor):
         You could also set self._attr_native_value in self._handle_coordinator_update()
         instead of implementing this method.
         """
-        return self.coordinator.data.latest_scrape[self.entity_description.key]
+        return self.coordinator.data.value(self.entity_description.key)
 
     @callback
     def _handle_coordinator_update(self) -> None:
@@ -1,28 +1,114 @@
 """Glue code that allows HomeAssistant to get data from pykwb."""
 
+import asyncio
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
 import logging
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, NamedTuple
 
-from pykwb.kwb import KWBMessageStream, TCPByteReader, load_signal_maps
+from pykwb.kwb import KWBMessageStream, TCPByteReader
 
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_TIMEOUT, CONF_UNIQUE_ID
+from homeassistant.core import HomeAssistant
 
 from ...const import (
+    BLOCKING_IO_TIMEOUT,
+    CAPTURE_BACKUP_COUNT,
+    CAPTURE_FLUSH_SIZE,
+    CAPTURE_MAX_BYTES,
     CONF_BOILER_EFFICIENCY,
     CONF_BOILER_NOMINAL_POWER,
+    CONF_CAPTURE_PATH,
+    CONF_MAX_INTEGRATION_GAP,
     CONF_PELLET_NOMINAL_ENERGY,
+    CONF_PERSISTENT_CONNECTION,
+    DEFAULT_MAX_INTEGRATION_GAP,
+    DEFAULT_PERSISTENT_CONNECTION,
+    LATE_RETRY_SCRAPES,
+    MIN_STALE_AFTER,
     OPT_LAST_BOILER_RUN_TIME,
     OPT_LAST_ENERGY_OUTPUT,
+    OPT_LAST_PELLET_BUCKETS,
     OPT_LAST_PELLET_CONSUMPTION,
     OPT_LAST_TIMESTAMP,
+    RECONNECT_BACKOFF_MAX,
+    RECONNECT_BACKOFF_MIN,
+    STALE_AFTER_CYCLES,
+    STREAM_STALE_AFTER,
 )
+from .bus.capture import CaptureWriter
+from .bus.frame import Frame
+from .bus.reader import AsyncTCPByteReader
+from .bus.signal_map import SignalMap
+from .config.derived.signals import setup_derived_signals
+from .consumption import PelletCounter
+from .derived import DerivedGraph
+from .energy import EnergyIntegrator
+
+if TYPE_CHECKING:
+    from .bus.connections import ConnectionManager
 
 logger = logging.getLogger(__name__)
 
+# Weight of the newest gap in the running bus cycle estimate of a message
+CYCLE_SMOOTHING = 0.2
+
+# Stands in for a key that has no value yet
+_MISSING = object()
+
+
+class CachedMessage(NamedTuple):
+    """The last decoded values of a message id and when they were received.
+
+    cycle is a running estimate of the seconds between two receptions.
+    payload is the raw frame payload the values were decoded from.
+    """
+
+    values: dict
+    bits: int
+    received: float
+    cycle: float | None = None
+    payload: bytes = b""
+
+    def age(self, now: float | None = None) -> float:
+        """Return the seconds since the message was received."""
+        return (time.monotonic() if now is None else now) - self.received
+
+
+class Snapshot(NamedTuple):
+    """The values of an appliance as of one update.
+
+    Snapshots are never changed. Every update that changes a value swaps
+    in a new one with the next generation, so a reader holding one never
+    sees it half updated, and a reader that already handled a generation
+    can skip it. Values that move on with time, like run time and energy,
+    are not part of it. They are in Appliance.live_values.
+    timestamp is the monotonic time of the update, and None for a
+    snapshot restored from disk.
+    """
+
+    values: Mapping[str, Any]
+    bits: Mapping[int, int]
+    generation: int = 0
+    timestamp: float | None = None
+
+
+EMPTY_SNAPSHOT = Snapshot(MappingProxyType({}), MappingProxyType({}))
+
 
 class Appliance:
     """A physical appliance or service."""
 
-    def __init__(self, config, signal_maps):
+    def __init__(
+        self,
+        config,
+        signal_map: SignalMap,
+        connections: "ConnectionManager | None" = None,
+        hass: HomeAssistant | None = None,
+    ):
         reader = TCPByteReader(ip=config.get(CONF_HOST), port=config.get(CONF_PORT))
         self.unique_id = config.get(CONF_UNIQUE_ID)
         self.unique_key = config.get(CONF_UNIQUE_ID).lower().replace(" ", "_")
@@ -36,26 +122,127 @@ class Appliance:
             "boiler_run_time": config.get(OPT_LAST_BOILER_RUN_TIME),
             "boiler_energy": config.get(OPT_LAST_ENERGY_OUTPUT),
             "pellet_consumption": config.get(OPT_LAST_PELLET_CONSUMPTION),
+            "pellet_buckets": config.get(OPT_LAST_PELLET_BUCKETS),
         }
         self.message_stream = KWBMessageStream(
             reader=reader,
-            signal_maps=signal_maps,
+            signal_maps=signal_map.raw,
             heater_config=heater_config,
             last_values=last_values,
         )
         # FIXME remove hard coded ids
         self.message_ids = [32, 33, 64, 65]
         self.read_timeout = config.get(CONF_TIMEOUT, 2)
+        # Keep one connection open and read continuously instead of
+        # connecting on every scrape
+        self.persistent = config.get(
+            CONF_PERSISTENT_CONNECTION, DEFAULT_PERSISTENT_CONNECTION
+        )
         # TODO support serial too
         # if args.mode == PROP_MODE_TCP:
         #     reader = TCPByteReader(ip=args.hostname, port=args.port)
         # elif args.mode == PROP_MODE_SERIAL:
         #   reader = SerialByteReader(dev=args.interface, baud=args.baud)
 
+        # Non-blocking reader used by async_scrape()
+        self.async_reader = AsyncTCPByteReader(
+            host=config.get(CONF_HOST),
+            port=config.get(CONF_PORT),
+            connect_timeout=self.read_timeout,
+        )
+        # Record the raw byte stream to reproduce problems offline
+        self.capture: CaptureWriter | None = None
+        if capture_path := config.get(CONF_CAPTURE_PATH):
+            self.capture = CaptureWriter(
+                capture_path, CAPTURE_MAX_BYTES, CAPTURE_BACKUP_COUNT
+            )
+            self.async_reader.capture = self.capture.append
+        self.signal_map = signal_map
+        self.heater_config = heater_config
+        self.last_values = last_values
+        # Lifetime energy, integrated on every boiler output sample
+        self.energy = EnergyIntegrator(
+            nominal_power=config.get(CONF_BOILER_NOMINAL_POWER),
+            efficiency=config.get(CONF_BOILER_EFFICIENCY),
+            max_gap=config.get(CONF_MAX_INTEGRATION_GAP, DEFAULT_MAX_INTEGRATION_GAP),
+            energy=last_values.get("boiler_energy") or 0.0,
+        )
+        # Pellets burned, counted from the fuel energy of every step
+        self.pellets: PelletCounter | None = None
+        if pellet_energy := config.get(CONF_PELLET_NOMINAL_ENERGY):
+            self.pellets = PelletCounter(
+                pellet_energy,
+                total=last_values.get("pellet_consumption") or 0.0,
+                buckets=last_values.get("pellet_buckets"),
+            )
+        # Values calculated from decoded signals instead of read from the bus
+        self.derived = DerivedGraph(
+            setup_derived_signals(
+                heater_config,
+                last_values,
+                self.energy,
+                self.pellets,
+                self.received_at,
+            )
+        )
+        # Message ids each key is read or calculated from, and the keys of
+        # each message id. Keys calculated from nothing on the bus have none.
+        self.source_ids: dict[str, tuple[int, ...]] = {
+            key: (message_id,) for key, message_id in signal_map.message_ids.items()
+        }
+        for key, sources in self.derived.sources.items():
+            self.source_ids[key] = tuple(
+                sorted(
+                    {
+                        signal_map.message_ids[source]
+                        for source in sources
+                        if source in signal_map.message_ids
+                    }
+                )
+            )
+        self.message_keys: dict[int, tuple[str, ...]] = {
+            message_id: tuple(
+                key
+                for key, source_ids in self.source_ids.items()
+                if message_id in source_ids
+            )
+            for message_id in signal_map.messages
+        }
+
         # State variables
-        self.latest_scrape = {}
+        self.snapshot = EMPTY_SNAPSHOT
+        # Wall time the restored snapshot was saved at
+        self._restored_saved: float | None = None
+        # Monotonic time of the last update, changed or not
+        self.last_received: float | None = None
+        # Last decoded message per message id. Serves ids that miss a scrape.
+        self.message_cache: dict[int, CachedMessage] = {}
+        # Seconds between polls, when polled. Messages are never expected faster.
+        self.poll_interval = 0.0
+        # Message ids that missed a scrape deadline, with the number of
+        # scrapes since that did not wait for them
+        self._late_ids: dict[int, int] = {}
+
+        # Called with message id and updated keys for every streamed message
+        self.message_listener: Callable[[int, set[str]], None] | None = None
+
+        # Persistent connection state. With a connection manager the
+        # connection is shared with other heaters instead of run by a task here.
+        self.connections = connections
+        # Runs the stream task as a background task of Home Assistant, so it
+        # is cancelled when Home Assistant stops
+        self.hass = hass
+        self._stream_task: asyncio.Task | None = None
+        self._stream_ready = asyncio.Event()
+        # Own worker thread for blocking I/O, so a hung call can't hold one
+        # of the shared executor threads of Home Assistant
+        self._executor: ThreadPoolExecutor | None = None
 
     def scrape(self):
+        """Connect, read one set of messages with pykwb and disconnect.
+
+        This blocks, so never call it from the event loop.
+        """
         self.message_stream.open()
 
         # TODO use read_data(), not read_messages()
@@ -72,36 +259,521 @@ class Appliance:
         #         self.latest_scrape[sensor_name] = sensor_value
 
         data = self.message_stream.read_data_once(self.message_ids, self.read_timeout)
-        self.latest_scrape.update(data)
 
         self.message_stream.close()
 
+        self._update(data)
+
         return True
 
+    async def async_scrape(self):
+        """Read one set of messages without blocking the event loop."""
+        if self.persistent:
+            return await self._async_scrape_stream()
 
-def create_appliance(config_heater: dict) -> tuple[bool, Appliance | Exception]:
-    def f():
+        await self.async_reader.async_open()
         try:
-            signal_maps = load_signal_maps()
-            heater = Appliance(config_heater, signal_maps)
-            is_success = heater.scrape()
-        except Exception as e:
-            logger.error("Error connecting to heater", exc_info=e)
-            return False, e
-        return is_success, heater
+            data, bits = await self._async_read_data_once()
+        finally:
+            await self.async_reader.async_close()
+            await self.async_flush_capture(force=True)
+
+        if not data and not bits:
+            return False
+        self._update(data, bits)
+
+        return True
+
+    async def async_start_streaming(self):
+        """Start reading messages continuously in the background."""
+        if self.connections is not None:
+            if self not in self.connections:
+                self._stream_ready.clear()
+                self.connections.add(self)
+            return
+        if self._stream_task and not self._stream_task.done():
+            return
+        self._stream_ready.clear()
+        name = f"kwb_heaters_{self.unique_key}"
+        if self.hass is not None:
+            self._stream_task = self.hass.async_create_background_task(
+                self._async_stream(), name
+            )
+        else:
+            self._stream_task = asyncio.get_running_loop().create_task(
+                self._async_stream(), name=name
+            )
+
+    async def async_stop_streaming(self):
+        """Stop the background reader and close the connection."""
+        if self.connections is not None:
+            await self.connections.async_remove(self)
+        task, self._stream_task = self._stream_task, None
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self.async_reader.async_close()
+        await self.async_flush_capture(force=True)
+        self._stream_ready.clear()
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def async_run_blocking(self, func: Callable, *args):
+        """Run a blocking call on the worker thread of this appliance.
+
+        Raises TimeoutError after BLOCKING_IO_TIMEOUT. The call can't be
+        interrupted, so it keeps the worker until it returns, but only calls
+        of this appliance queue up behind it.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"kwb_heaters_{self.unique_key}"
+            )
+        loop = asyncio.get_running_loop()
+        async with asyncio.timeout(BLOCKING_IO_TIMEOUT):
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    @property
+    def latest_scrape(self) -> Mapping[str, Any]:
+        """Return the values of the current snapshot."""
+        return self.snapshot.values
+
+    @property
+    def live_values(self) -> Mapping[str, Any]:
+        """Return the derived values that move on with time, like energy."""
+        return MappingProxyType(self.derived.live)
+
+    def value(self, key: str, default: Any = None) -> Any:
+        """Return the current value of a signal, live or from the snapshot."""
+        live = self.derived.live
+        if key in live:
+            return live[key]
+        return self.snapshot.values.get(key, default)
+
+    @property
+    def latest_bits(self) -> Mapping[int, int]:
+        """Return the bitsets of binary signals of the current snapshot."""
+        return self.snapshot.bits
+
+    @property
+    def is_restored(self) -> bool:
+        """Return True while all values were restored from disk, none read live."""
+        return self.snapshot.timestamp is None and bool(self.snapshot.values)
+
+    def snapshot_data(self) -> dict:
+        """Return the current snapshot to persist."""
+        snapshot = self.snapshot
+        return {
+            "values": dict(snapshot.values),
+            "bits": {
+                str(message_id): bits for message_id, bits in snapshot.bits.items()
+            },
+            "live": dict(self.derived.live),
+            "saved": time.time(),
+        }
+
+    def restore_snapshot(self, data: dict):
+        """Serve a persisted snapshot until the first live update.
 
-    return f
+        Does nothing once values were read live.
+        """
+        if self.snapshot.timestamp is not None or not data.get("values"):
+            return
+        values = dict(data["values"])
+        live = {
+            key: values.pop(key) for key in self.derived.live_keys if key in values
+        }
+        live.update(data.get("live") or {})
+        self.derived.live.update(live)
+        self.snapshot = Snapshot(
+            MappingProxyType(values),
+            MappingProxyType(
+                {int(message_id): bits for message_id, bits in data["bits"].items()}
+            ),
+        )
+        self._restored_saved = data.get("saved")
+
+    def adopt(self, other: "Appliance"):
+        """Take over the messages another appliance of the same heater read.
+
+        Derived values are calculated again, with the counters of this one.
+        A stream the other one runs on the same connection manager is taken
+        over too, without reconnecting.
+        """
+        if self.connections is not None and other.connections is self.connections:
+            self.connections.transfer(other, self)
+        self.message_cache.update(other.message_cache)
+        values = {
+            key: value
+            for key, value in other.snapshot.values.items()
+            if key not in self.derived.keys
+        }
+        self._update(values, dict(other.snapshot.bits))
+
+    def decode_frame(self, frame: Frame) -> tuple[dict, int] | None:
+        """Return the numeric values and the binary signal bitset of a frame.
+
+        Returns None if the message id is not mapped.
+        """
+        decoder = self.signal_map.decoders.get(frame.message_id)
+        if decoder is None:
+            return None
+        return decoder.decode(frame.payload), decoder.decode_bits(frame.payload)
+
+    def decode_frame_cached(
+        self, frame: Frame, now: float | None = None
+    ) -> tuple[dict, int, bool] | None:
+        """Like decode_frame, but reuse the last decoded values of a repeated payload.
+
+        The flag is True if the payload repeats the last one of a fresh
+        message, so nothing downstream has to look at the frame again. A
+        stale message that comes back unchanged is not flagged, because its
+        signals have to become available again.
+        """
+        previous = self.message_cache.get(frame.message_id)
+        # bytes compare lengths before contents, so a change usually costs
+        # one comparison
+        if previous is not None and previous.payload == frame.payload:
+            unchanged = self.is_message_fresh(frame.message_id, now)
+            return previous.values, previous.bits, unchanged
+        decoded = self.decode_frame(frame)
+        if decoded is None:
+            return None
+        return decoded[0], decoded[1], False
+
+    def is_on(self, key: str) -> bool | None:
+        """Return a binary signal from the bitset of its message.
+
+        Values that are not bus signals, like boiler_on, come from latest_scrape.
+        Returns None until a value was received.
+        """
+        snapshot = self.snapshot
+        position = self.signal_map.bit_positions.get(key)
+        if position is not None and position[0] in snapshot.bits:
+            message_id, bit = position
+            return bool(snapshot.bits[message_id] >> bit & 1)
+        value = snapshot.values.get(key)
+        return None if value is None else bool(value)
+
+    def message_ages(self) -> dict[int, float]:
+        """Return the seconds since each message id was last received."""
+        now = time.monotonic()
+        return {
+            message_id: message.age(now)
+            for message_id, message in self.message_cache.items()
+        }
+
+    def counters(self) -> dict:
+        """Return the lifetime counters to persist, keyed like last_values."""
+        last_values = self.last_values
+        latest = self.derived.live
+        return {
+            "last_timestamp": latest.get(
+                "last_timestamp", last_values.get("last_timestamp")
+            ),
+            "boiler_run_time": latest.get(
+                "boiler_run_time", last_values.get("boiler_run_time")
+            ),
+            "boiler_energy": self.energy.energy,
+            "pellet_consumption": (
+                self.pellets.total
+                if self.pellets
+                else last_values.get("pellet_consumption")
+            ),
+            "pellet_buckets": (
+                self.pellets.buckets()
+                if self.pellets
+                else last_values.get("pellet_buckets")
+            ),
+        }
+
+    def is_message_fresh(self, message_id: int, now: float | None = None) -> bool:
+        """Return True unless a message missed STALE_AFTER_CYCLES bus cycles."""
+        message = self.message_cache.get(message_id)
+        if message is None:
+            return False
+        cycle = max(message.cycle or STREAM_STALE_AFTER, self.poll_interval)
+        return message.age(now) <= max(STALE_AFTER_CYCLES * cycle, MIN_STALE_AFTER)
+
+    def is_fresh(self, key: str) -> bool:
+        """Return True if a signal is recent enough to be shown.
+
+        Values calculated from signals, like boiler_power, are fresh while
+        every message they are calculated from is. Values calculated from
+        nothing on the bus always are. Restored values are shown until the
+        first live update, with their age telling how stale they are.
+        """
+        if self.is_restored:
+            return True
+        is_message_fresh = self.is_message_fresh
+        return all(
+            is_message_fresh(message_id) for message_id in self.source_ids.get(key, ())
+        )
+
+    def received_at(self, key: str, now: float | None = None) -> float | None:
+        """Return the monotonic time a signal was received, or None if it is stale.
 
+        Calculated values count as received with the oldest message they
+        come from. Values not from the bus and restored values never count
+        as received.
+        """
+        received = None
+        for message_id in self.source_ids.get(key, ()):
+            if not self.is_message_fresh(message_id, now):
+                return None
+            message_received = self.message_cache[message_id].received
+            if received is None or message_received < received:
+                received = message_received
+        return received
 
-def connect_appliance(config_heater: dict) -> tuple[bool, Appliance | Exception]:
-    """Called by config_flow.py"""
+    def signal_age(self, key: str) -> float | None:
+        """Return the seconds since a signal was received, or None.
 
-    def f():
+        Calculated values are as old as the oldest message they come from.
+        """
+        now = time.monotonic()
+        ages = [
+            self.message_cache[message_id].age(now)
+            for message_id in self.source_ids.get(key, ())
+            if message_id in self.message_cache
+        ]
+        if ages:
+            return max(ages)
+        if self.is_restored and self._restored_saved is not None:
+            return time.time() - self._restored_saved
+        return None
+
+    def handle_frames(self, frames: list[Frame]):
+        """Decode streamed frames and tell the message listener about them.
+
+        Frames that repeat the last payload of their message neither copy
+        the snapshot nor bump its generation. They only move on the live
+        values, once per batch, which go out with the next change or refresh.
+        """
+        now = time.monotonic()
+        repeated = False
+        for frame in frames:
+            decoded = self.decode_frame_cached(frame, now)
+            if decoded is None:
+                continue
+            values, bits, unchanged = decoded
+            self._cache_message(frame.message_id, values, bits, frame.payload)
+            self._stream_ready.set()
+            if unchanged:
+                repeated = True
+                continue
+            keys = self._update(values, {frame.message_id: bits})
+            if self.message_listener:
+                self.message_listener(frame.message_id, keys)
+        if repeated:
+            self.last_received = now
+            self.derived.advance(self.snapshot.values, now)
+
+    async def async_flush_capture(self, force: bool = False):
+        """Write the buffered capture in an executor once enough has piled up."""
+        capture = self.capture
+        if capture is None or not capture.pending:
+            return
+        if not force and capture.pending < CAPTURE_FLUSH_SIZE:
+            return
+        # Swapped here on the loop, where append() runs
+        data = capture.take()
         try:
-            is_success, heater = create_appliance(config_heater)()
-        except Exception as e:
-            return False, e
+            await self.async_run_blocking(capture.write, data)
+        except TimeoutError:
+            logger.warning(
+                "Writing capture %s took longer than %s s",
+                capture.path,
+                BLOCKING_IO_TIMEOUT,
+            )
+        except OSError as e:
+            logger.error("Failed writing capture %s", capture.path, exc_info=e)
+
+    def _cache_message(
+        self, message_id: int, values: dict, bits: int, payload: bytes = b""
+    ):
+        now = time.monotonic()
+        previous = self.message_cache.get(message_id)
+        cycle = None
+        if previous is not None:
+            gap = now - previous.received
+            cycle = (
+                gap
+                if previous.cycle is None
+                else previous.cycle + CYCLE_SMOOTHING * (gap - previous.cycle)
+            )
+        self.message_cache[message_id] = CachedMessage(
+            values, bits, now, cycle, payload
+        )
+
+    async def _async_read_data_once(self) -> tuple[dict, dict[int, int]]:
+        """Read frames until every expected message id was seen or the timeout expires.
+
+        Message ids that missed a deadline are not waited for, but are taken
+        if they arrive. They are waited for again after LATE_RETRY_SCRAPES
+        scrapes, or as soon as their cached message went stale, so they
+        can't starve. Ids missing at the deadline keep their cached values in
+        latest_scrape, and their age in message_cache.
+        Returns numeric values and the binary signal bitset of each message id.
+        Values of messages that repeated their last payload are left out.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.read_timeout
+        late_ids = self._late_ids
+        now = time.monotonic()
+        expected = {
+            message_id
+            for message_id in self.message_ids
+            if late_ids.get(message_id, LATE_RETRY_SCRAPES) >= LATE_RETRY_SCRAPES
+            or (
+                message_id in self.message_cache
+                and not self.is_message_fresh(message_id, now)
+            )
+        }
+        data = {}
+        bits = {}
+        while not bits.keys() >= expected:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                async with asyncio.timeout(remaining):
+                    frames = await self.async_reader.async_read_frames()
+            except TimeoutError:
+                break
+            for frame in frames:
+                decoded = self.decode_frame_cached(frame)
+                if decoded is None:
+                    continue
+                values, message_bits, unchanged = decoded
+                if not unchanged:
+                    data.update(values)
+                bits[frame.message_id] = message_bits
+                self._cache_message(
+                    frame.message_id, values, message_bits, frame.payload
+                )
+
+        self._late_ids = {
+            message_id: 0 if message_id in expected else late_ids[message_id] + 1
+            for message_id in self.message_ids
+            if message_id not in bits
+        }
+        if self._late_ids:
+            now = time.monotonic()
+            logger.debug(
+                "Heater %s missed message ids %s, ages %s",
+                self.unique_id,
+                set(self._late_ids),
+                {
+                    message_id: self.message_cache[message_id].age(now)
+                    for message_id in self._late_ids
+                    if message_id in self.message_cache
+                },
+            )
+        return data, bits
+
+    async def _async_scrape_stream(self):
+        """Return True if the background reader has recent data."""
+        await self.async_start_streaming()
+        # First scrape after start has to wait for the first message
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(self.read_timeout):
+                await self._stream_ready.wait()
+        last_received = self.last_received
+        if last_received is None:
+            return False
+        return time.monotonic() - last_received < STREAM_STALE_AFTER
+
+    async def _async_stream(self):
+        """Read frames until cancelled, reconnecting with backoff."""
+        backoff = RECONNECT_BACKOFF_MIN
+        while True:
+            try:
+                await self.async_reader.async_open()
+                while True:
+                    # A gateway that stops sending is as good as disconnected
+                    async with asyncio.timeout(STREAM_STALE_AFTER):
+                        frames = await self.async_reader.async_read_frames()
+                    if frames:
+                        backoff = RECONNECT_BACKOFF_MIN
+                        self.handle_frames(frames)
+                    await self.async_flush_capture()
+            except (OSError, TimeoutError) as e:
+                logger.warning(
+                    "Lost connection to heater %s, reconnecting in %s s: %s",
+                    self.unique_id,
+                    backoff,
+                    e,
+                )
+            except Exception:
+                # A bug must not end streaming for good
+                logger.exception(
+                    "Error streaming from heater %s, reconnecting in %s s",
+                    self.unique_id,
+                    backoff,
+                )
+            finally:
+                await self.async_reader.async_close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+
+    def _update(self, data: dict, bits: dict[int, int] | None = None) -> set[str]:
+        """Swap in a snapshot with decoded signals and updated derived values.
+
+        Only a changed value or bitset makes a new snapshot. Otherwise the
+        snapshot and its generation stay, and just the live values move on.
+        Returns the keys whose value changed.
+        """
+        now = time.monotonic()
+        self.last_received = now
+        snapshot = self.snapshot
+        current = snapshot.values
+        updated = {
+            key: value
+            for key, value in data.items()
+            if current.get(key, _MISSING) != value
+        }
+        if bits:
+            current_bits = snapshot.bits
+            bits = {
+                message_id: message_bits
+                for message_id, message_bits in bits.items()
+                if current_bits.get(message_id) != message_bits
+            }
+        # A restored snapshot is replaced by the first live update regardless
+        if not updated and not bits and snapshot.timestamp is not None:
+            return self.derived.advance(current, now)
+
+        values = dict(current)
+        values.update(updated)
+        derived = self.derived.evaluate(values, updated.keys(), now)
+        self.snapshot = Snapshot(
+            MappingProxyType(values),
+            MappingProxyType({**snapshot.bits, **bits}) if bits else snapshot.bits,
+            snapshot.generation + 1,
+            now,
+        )
+
+        return derived.union(updated)
+
+
+async def async_connect_appliance(
+    config_heater: dict,
+    signal_map: SignalMap,
+    connections: "ConnectionManager | None" = None,
+    hass: HomeAssistant | None = None,
+) -> tuple[bool, Appliance | Exception]:
+    """Create an appliance and test it with one scrape.
 
-        return is_success, heater
+    Called by config_flow.py and __init__.py
+    """
+    try:
+        heater = Appliance(config_heater, signal_map, connections, hass)
+        is_success = await heater.async_scrape()
+    except Exception as e:
+        logger.error("Error connecting to heater", exc_info=e)
+        return False, e
 
-    return f
+    return is_success, heater
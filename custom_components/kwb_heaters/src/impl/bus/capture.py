@@ -0,0 +1,221 @@
+"""Record the raw KWB byte stream to disk and replay it.
+
+A capture file starts with MAGIC, followed by one record per chunk read
+from the gateway: a RECORD header with the monotonic time in nanoseconds
+and the chunk length, then the chunk itself. Files rotate by size like
+logging.handlers.RotatingFileHandler, so capture.bin.1 is the newest
+complete file.
+"""
+
+import asyncio
+from collections.abc import Iterator
+import logging
+import mmap
+import os
+import struct
+import time
+
+from pykwb.kwb import ByteReader
+
+from .frame import Frame, FrameParser
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KWBCAP1\n"
+RECORD = struct.Struct("<QI")
+
+
+def is_capture(path: str) -> bool:
+    """Return True if path is a capture file rather than plain raw bytes."""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def iter_records(buffer) -> Iterator[tuple[int, memoryview]]:
+    """Yield (monotonic ns, chunk) for every complete record of a capture.
+
+    buffer is usually an mmap, so chunks are views and nothing is copied.
+    A record cut short by a crash ends the capture.
+    """
+    view = memoryview(buffer)
+    if view[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a KWB capture")
+    position = len(MAGIC)
+    end = len(view)
+    while position + RECORD.size <= end:
+        timestamp, length = RECORD.unpack_from(view, position)
+        position += RECORD.size
+        if position + length > end:
+            break
+        yield timestamp, view[position : position + length]
+        position += length
+
+
+class CaptureWriter:
+    """Append timestamped chunks to a size rotated capture file.
+
+    append() only buffers, so it is safe to call from the event loop.
+    take() hands over the buffered records, on the same thread as append(),
+    and write() does the file I/O with them in an executor. The buffer is
+    never touched by two threads.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._buffer = bytearray()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def append(self, chunk: bytes, timestamp: int | None = None):
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        self._buffer += RECORD.pack(timestamp, len(chunk))
+        self._buffer += chunk
+
+    def take(self) -> bytearray:
+        """Return the buffered records and start a new buffer."""
+        data, self._buffer = self._buffer, bytearray()
+        return data
+
+    def flush(self):
+        """Write buffered records. Only for callers that also append()."""
+        self.write(self.take())
+
+    def write(self, data: bytes):
+        """Write records, rotating first if the file would grow too big."""
+        if not data:
+            return
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+            size = 0
+        with open(self.path, "ab") as file:
+            if not size:
+                file.write(MAGIC)
+            file.write(data)
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class _CaptureReplay:
+    """Walk the chunks of a memory mapped capture, optionally in real time."""
+
+    def __init__(self, path: str, realtime: bool):
+        self.path = path
+        self.realtime = realtime
+        self._file = None
+        self._mmap: mmap.mmap | None = None
+        self._records: Iterator[tuple[int, memoryview]] | None = None
+        # Offset between capture time and now, set by the first chunk
+        self._offset: int | None = None
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._records = iter_records(self._mmap)
+        self._offset = None
+
+    def _close(self):
+        # Views into the map have to go before the map itself
+        self._records = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _next(self) -> tuple[float, bytes] | None:
+        """Return the next chunk and the seconds to wait before delivering it."""
+        record = next(self._records, None)
+        if record is None:
+            return None
+        timestamp, chunk = record
+        delay = 0.0
+        if self.realtime:
+            now = time.monotonic_ns()
+            if self._offset is None:
+                self._offset = now - timestamp
+            delay = max(timestamp + self._offset - now, 0) / 1e9
+        return delay, bytes(chunk)
+
+
+class CaptureByteReader(_CaptureReplay, ByteReader):
+    """pykwb ByteReader that replays a capture file. Blocks, so use it offline."""
+
+    def __init__(self, path: str, realtime: bool = False):
+        super().__init__(path, realtime)
+        # Chunks not read yet start at _position. pykwb reads a byte at a
+        # time, so read bytes are only dropped when the next chunk comes in.
+        self._pending = bytearray()
+        self._position = 0
+
+    def open(self):
+        self._open()
+        self._pending.clear()
+        self._position = 0
+
+    def close(self):
+        self._close()
+
+    def read(self, size=1):
+        pending = self._pending
+        while len(pending) - self._position < size:
+            record = self._next()
+            if record is None:
+                break
+            delay, chunk = record
+            if delay:
+                time.sleep(delay)
+            del pending[: self._position]
+            self._position = 0
+            pending += chunk
+        data = bytes(pending[self._position : self._position + size])
+        self._position += len(data)
+        return data
+
+
+class CaptureAsyncReader(_CaptureReplay):
+    """Replay a capture file in place of an AsyncTCPByteReader.
+
+    The end of the capture looks like the gateway closing the connection.
+    """
+
+    def __init__(self, path: str, realtime: bool = False):
+        super().__init__(path, realtime)
+        self.parser = FrameParser()
+
+    @property
+    def is_open(self) -> bool:
+        return self._mmap is not None
+
+    async def async_open(self):
+        self.parser.reset()
+        self._open()
+
+    async def async_close(self):
+        self._close()
+
+    async def async_read_frames(self) -> list[Frame]:
+        record = self._next()
+        if record is None:
+            raise ConnectionResetError(f"End of capture {self.path}")
+        delay, chunk = record
+        if delay:
+            await asyncio.sleep(delay)
+        return self.parser.feed(chunk)
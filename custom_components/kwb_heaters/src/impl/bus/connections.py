@@ -0,0 +1,233 @@
+"""Run the persistent bus connections of every heater from one task."""
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+
+from ....const import (
+    CAPTURE_FLUSH_SIZE,
+    DATA_CONNECTIONS,
+    DOMAIN,
+    RECONNECT_BACKOFF_MAX,
+    RECONNECT_BACKOFF_MIN,
+    STREAM_STALE_AFTER,
+)
+from .frame import Frame
+from .reader import FrameProtocol
+
+if TYPE_CHECKING:
+    from ..appliance import Appliance
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks for connections to open or drop
+SUPERVISE_INTERVAL = 1
+# Spreads phases evenly however many heaters there are
+GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+@dataclass
+class _Connection:
+    appliance: "Appliance"
+    protocol: FrameProtocol | None = None
+    connecting: bool = False
+    backoff: float = RECONNECT_BACKOFF_MIN
+    retry_at: float = field(default_factory=time.monotonic)
+    # Capture write in progress
+    flush: asyncio.Task | None = None
+
+
+class ConnectionManager:
+    """Share one supervisor task between the bus connections of all heaters.
+
+    Bytes are parsed and decoded in protocol callbacks as the event loop
+    receives them, so another heater costs a socket, not a reader task.
+    The supervisor opens connections, reconnects them with backoff and
+    drops those that went quiet. Refreshes of the coordinators are spread
+    over their interval with phase().
+
+    Tasks are Home Assistant background tasks, so they are cancelled when
+    it stops.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._connections: dict[str, _Connection] = {}
+        self._phases: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    def __contains__(self, appliance: "Appliance") -> bool:
+        connection = self._connections.get(appliance.unique_key)
+        return connection is not None and connection.appliance is appliance
+
+    def phase(self, key: str) -> float:
+        """Return the fraction of the refresh interval to offset a heater by."""
+        if key not in self._phases:
+            self._phases[key] = len(self._phases) * GOLDEN_RATIO_FRACTION % 1
+        return self._phases[key]
+
+    def add(self, appliance: "Appliance"):
+        """Start streaming an appliance. It connects on the next supervisor pass.
+
+        Replaces the connection of another appliance of the same heater.
+        """
+        if appliance in self:
+            return
+        if previous := self._connections.get(appliance.unique_key):
+            self._close(previous)
+        self._connections[appliance.unique_key] = _Connection(appliance)
+        if self._task is None or self._task.done():
+            self._task = self.hass.async_create_background_task(
+                self._async_supervise(), f"{DOMAIN}_connections"
+            )
+        self._wakeup.set()
+
+    def transfer(self, old: "Appliance", new: "Appliance") -> bool:
+        """Hand the connection of one appliance to another, without reconnecting.
+
+        Returns False if old has no connection.
+        """
+        if old not in self:
+            return False
+        connection = self._connections.pop(old.unique_key)
+        connection.appliance = new
+        if connection.protocol is not None:
+            connection.protocol.capture = new.capture.append if new.capture else None
+        if previous := self._connections.get(new.unique_key):
+            self._close(previous)
+        self._connections[new.unique_key] = connection
+        return True
+
+    async def async_remove(self, appliance: "Appliance"):
+        """Stop streaming an appliance and close its connection."""
+        if appliance not in self:
+            return
+        self._close(self._connections.pop(appliance.unique_key))
+        if not self._connections and self._task:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _close(self, connection: _Connection):
+        if connection.protocol and connection.protocol.transport:
+            connection.protocol.transport.close()
+
+    async def _async_supervise(self):
+        while self._connections:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = []
+            for connection in list(self._connections.values()):
+                protocol = connection.protocol
+                if protocol is None:
+                    if not connection.connecting and now >= connection.retry_at:
+                        due.append(connection)
+                elif protocol.transport is None:
+                    # Connecting
+                    continue
+                elif now - protocol.last_received > STREAM_STALE_AFTER:
+                    # A gateway that stops sending is as good as disconnected
+                    logger.warning(
+                        "No data from heater %s for %s s",
+                        connection.appliance.unique_id,
+                        STREAM_STALE_AFTER,
+                    )
+                    protocol.transport.abort()
+                else:
+                    self._start_flush(connection)
+            if due:
+                await asyncio.gather(
+                    *(self._async_connect(connection) for connection in due)
+                )
+            try:
+                async with asyncio.timeout(SUPERVISE_INTERVAL):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+
+    async def _async_connect(self, connection: _Connection):
+        appliance = connection.appliance
+        reader = appliance.async_reader
+        connection.connecting = True
+        try:
+            async with asyncio.timeout(reader.connect_timeout):
+                transport, _ = await asyncio.get_running_loop().create_connection(
+                    lambda: self._create_protocol(connection),
+                    reader.host,
+                    reader.port,
+                )
+            if self._connections.get(appliance.unique_key) is not connection:
+                # Removed while connecting
+                transport.close()
+        except (OSError, TimeoutError) as e:
+            connection.protocol = None
+            self._schedule_retry(connection, e)
+        except Exception as e:
+            # A bug must not end the supervisor of every heater
+            logger.exception("Error connecting to heater %s", appliance.unique_id)
+            connection.protocol = None
+            self._schedule_retry(connection, e)
+        finally:
+            connection.connecting = False
+
+    def _start_flush(self, connection: _Connection):
+        """Write the capture of a connection without holding up the others."""
+        appliance = connection.appliance
+        capture = appliance.capture
+        if capture is None or capture.pending < CAPTURE_FLUSH_SIZE:
+            return
+        if connection.flush is not None and not connection.flush.done():
+            return
+        connection.flush = self.hass.async_create_background_task(
+            appliance.async_flush_capture(), f"{DOMAIN}_{appliance.unique_key}_capture"
+        )
+
+    def _create_protocol(self, connection: _Connection) -> FrameProtocol:
+        appliance = connection.appliance
+
+        # The connection may be handed to another appliance, so look it up
+        @callback
+        def on_frames(frames: list[Frame]):
+            connection.backoff = RECONNECT_BACKOFF_MIN
+            connection.appliance.handle_frames(frames)
+
+        @callback
+        def on_lost(exc: Exception | None):
+            connection.protocol = None
+            if self._connections.get(connection.appliance.unique_key) is connection:
+                self._schedule_retry(connection, exc)
+                self._wakeup.set()
+
+        connection.protocol = FrameProtocol(
+            on_frames,
+            on_lost,
+            appliance.capture.append if appliance.capture else None,
+        )
+        return connection.protocol
+
+    def _schedule_retry(self, connection: _Connection, error: Exception | None):
+        logger.warning(
+            "Lost connection to heater %s, reconnecting in %s s: %s",
+            connection.appliance.unique_id,
+            connection.backoff,
+            error,
+        )
+        connection.retry_at = time.monotonic() + connection.backoff
+        connection.backoff = min(connection.backoff * 2, RECONNECT_BACKOFF_MAX)
+
+
+@callback
+def async_get_connection_manager(hass: HomeAssistant) -> ConnectionManager:
+    """Return the connection manager shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CONNECTIONS not in domain_data:
+        domain_data[DATA_CONNECTIONS] = ConnectionManager(hass)
+    return domain_data[DATA_CONNECTIONS]
@@ -0,0 +1,127 @@
+"""Decode message payloads into signal values."""
+
+from __future__ import annotations
+
+import logging
+import struct
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .signal_map import SignalDefinition
+
+logger = logging.getLogger(__name__)
+
+# struct codes of big-endian integers by byte length, as (signed, unsigned)
+INT_CODES = {1: ("b", "B"), 2: ("h", "H"), 4: ("i", "I"), 8: ("q", "Q")}
+
+
+def decode_payload(payload: bytes, signals: tuple[SignalDefinition, ...]) -> dict:
+    """Walk the signal definitions and pull every value out of the payload."""
+    data = {}
+    size = len(payload)
+    for signal in signals:
+        if signal.is_binary:
+            if signal.offset // 8 >= size:
+                continue
+            data[signal.key] = (payload[signal.offset // 8] >> (signal.offset % 8)) & 1
+        else:
+            if signal.offset + signal.length > size:
+                continue
+            value = int.from_bytes(
+                payload[signal.offset : signal.offset + signal.length],
+                "big",
+                signed=signal.kind != "u",
+            )
+            factor = signal.factor
+            data[signal.key] = value * factor if factor and factor != 1 else value
+
+    return data
+
+
+class MessageDecoder:
+    """Decoder compiled from the signals of one message id.
+
+    All numeric signals are read by one precompiled struct, so a payload is
+    unpacked in a single pass. Only signals with a scale factor are touched
+    afterwards. Maps that struct can't express (odd widths, overlapping
+    signals) and short payloads fall back to decode_payload().
+
+    Binary signals are not put in the values dict. decode_bits() returns
+    all of them as one integer, where bit n is the signal at bit index n.
+    """
+
+    __slots__ = (
+        "signals",
+        "size",
+        "bit_keys",
+        "_numeric",
+        "_struct",
+        "_keys",
+        "_scaled",
+        "_bit_mask",
+        "_bit_bytes",
+    )
+
+    def __init__(self, signals: tuple[SignalDefinition, ...]):
+        self.signals = signals
+        self._numeric = tuple(signal for signal in signals if not signal.is_binary)
+
+        fmt = [">"]
+        position = 0
+        keys = []
+        scaled = []
+        compiled = True
+        for signal in sorted(self._numeric, key=lambda signal: signal.offset):
+            codes = INT_CODES.get(signal.length)
+            if codes is None or signal.offset < position:
+                compiled = False
+                break
+            if signal.offset > position:
+                fmt.append(f"{signal.offset - position}x")
+            fmt.append(codes[1] if signal.kind == "u" else codes[0])
+            position = signal.offset + signal.length
+            if signal.factor and signal.factor != 1:
+                scaled.append((len(keys), signal.factor))
+            keys.append(signal.key)
+
+        self._struct = struct.Struct("".join(fmt)) if compiled else None
+        self._keys = tuple(keys)
+        self._scaled = tuple(scaled)
+
+        # Bit index of every binary signal, and the mask selecting all of them
+        self.bit_keys: dict[int, str] = {
+            signal.offset: signal.key for signal in signals if signal.is_binary
+        }
+        self._bit_mask = sum(1 << bit for bit in self.bit_keys)
+        self._bit_bytes = (max(self.bit_keys) // 8 + 1) if self.bit_keys else 0
+
+        # Shortest payload that holds every numeric signal
+        self.size = max(
+            (signal.offset + signal.length for signal in self._numeric), default=0
+        )
+
+    @property
+    def compiled(self) -> bool:
+        return self._struct is not None
+
+    @property
+    def payload_size(self) -> int:
+        """Return the shortest payload that holds every signal, binary ones too."""
+        return max(self.size, self._bit_bytes)
+
+    def decode(self, payload: bytes | memoryview) -> dict:
+        """Return the values of all numeric signals."""
+        if self._struct is None or len(payload) < self.size:
+            return decode_payload(payload, self._numeric)
+
+        values = self._struct.unpack_from(payload)
+        if self._scaled:
+            values = list(values)
+            for index, factor in self._scaled:
+                values[index] *= factor
+
+        return dict(zip(self._keys, values))
+
+    def decode_bits(self, payload: bytes | memoryview) -> int:
+        """Return all binary signals in one integer operation."""
+        return int.from_bytes(payload[: self._bit_bytes], "little") & self._bit_mask
@@ -0,0 +1,109 @@
+"""Split the raw KWB RS485 byte stream into messages.
+
+This follows the sense packet framing used by pykwb:
+
+    0x02 0x02 <length> <message id> <counter> <data[length]> <checksum>
+
+where every 0x02 inside data is padded with a 0x00 and length counts the
+padded bytes. The checksum is a rotate-left-and-add over everything after
+the two start bytes.
+"""
+
+from dataclasses import dataclass
+import logging
+
+logger = logging.getLogger(__name__)
+
+FRAME_START = b"\x02\x02"
+# Start bytes, length, message id and counter
+HEADER_LENGTH = 5
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    """One complete message read from the bus."""
+
+    message_id: int
+    counter: int
+    payload: bytes
+
+
+def checksum(data: bytes) -> int:
+    """Calculate the KWB checksum over the bytes following the start bytes."""
+    value = 2
+    for byte in data:
+        value = ((value << 1) | (value >> 7)) & 0xFF
+        value += byte
+        if value > 255:
+            value -= 255
+    return value
+
+
+def pad(data: bytes) -> bytes:
+    """Add a 0x00 pad byte after every 0x02 in message data."""
+    return bytes(data).replace(b"\x02", b"\x02\x00")
+
+
+def unpad(data: bytes) -> bytes:
+    """Remove the 0x00 pad bytes that follow every 0x02 in message data."""
+    if b"\x02\x00" not in data:
+        return bytes(data)
+    return bytes(data).replace(b"\x02\x00", b"\x02")
+
+
+def encode_frame(message_id: int, counter: int, payload: bytes) -> bytes:
+    """Build a frame the way a sender puts it on the bus."""
+    data = pad(payload)
+    body = bytes((len(data), message_id, counter)) + data
+    return FRAME_START + body + bytes((checksum(body),))
+
+
+class FrameParser:
+    """Incremental parser. Feed it bytes as they arrive, get frames back."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.corrupted = 0
+
+    def feed(self, data: bytes) -> list[Frame]:
+        """Add data to the buffer and return every frame it completes."""
+        buffer = self._buffer
+        buffer += data
+        frames = []
+
+        while True:
+            start = buffer.find(FRAME_START)
+            if start < 0:
+                # Keep a trailing start byte, the next one may follow it
+                del buffer[: max(len(buffer) - 1, 0)]
+                break
+            if start:
+                del buffer[:start]
+            if len(buffer) < HEADER_LENGTH:
+                break
+
+            end = HEADER_LENGTH + buffer[2]
+            if len(buffer) <= end:
+                break
+
+            if checksum(buffer[2:end]) != buffer[end]:
+                # Not a frame, or a damaged one. Resync on the next start bytes
+                self.corrupted += 1
+                logger.debug("Dropping corrupted frame %s", bytes(buffer[: end + 1]))
+                del buffer[:1]
+                continue
+
+            frames.append(
+                Frame(
+                    message_id=buffer[3],
+                    counter=buffer[4],
+                    payload=unpad(buffer[HEADER_LENGTH:end]),
+                )
+            )
+            del buffer[: end + 1]
+
+        return frames
+
+    def reset(self):
+        """Forget partial data, e.g. after a reconnect."""
+        self._buffer.clear()
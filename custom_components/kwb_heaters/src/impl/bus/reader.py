@@ -0,0 +1,101 @@
+"""Read the KWB byte stream without blocking the event loop."""
+
+import asyncio
+from collections.abc import Callable
+import logging
+import time
+
+from .frame import Frame, FrameParser
+
+logger = logging.getLogger(__name__)
+
+# Bytes requested from the socket per read
+READ_CHUNK_SIZE = 1024
+
+
+class AsyncTCPByteReader:
+    """Read frames from an RS485 to TCP gateway with asyncio streams."""
+
+    def __init__(self, host: str, port: int, connect_timeout: float):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.parser = FrameParser()
+        # Called with every chunk read, before it is parsed
+        self.capture: Callable[[bytes], None] | None = None
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def async_open(self):
+        self.parser.reset()
+        async with asyncio.timeout(self.connect_timeout):
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+
+    async def async_close(self):
+        """Close the connection, or tear it down if it does not close in time."""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            async with asyncio.timeout(self.connect_timeout):
+                await writer.wait_closed()
+        except TimeoutError:
+            logger.debug("Connection to %s did not close, aborting it", self.host)
+            writer.transport.abort()
+        except (ConnectionError, OSError) as e:
+            logger.debug("Error closing connection to %s", self.host, exc_info=e)
+        except asyncio.CancelledError:
+            writer.transport.abort()
+            raise
+
+    async def async_read_frames(self) -> list[Frame]:
+        """Wait for the next chunk of bytes and return the frames it completes."""
+        chunk = await self._reader.read(READ_CHUNK_SIZE)
+        if not chunk:
+            raise ConnectionResetError(f"Connection closed by {self.host}")
+        if self.capture:
+            self.capture(chunk)
+        return self.parser.feed(chunk)
+
+
+class FrameProtocol(asyncio.Protocol):
+    """Parse frames in the event loop's own callbacks, without a reader task.
+
+    on_frames is called with the frames each chunk completes, on_lost with
+    the exception that ended the connection, or None.
+    """
+
+    def __init__(
+        self,
+        on_frames: Callable[[list[Frame]], None],
+        on_lost: Callable[[Exception | None], None],
+        capture: Callable[[bytes], None] | None = None,
+    ):
+        self.on_frames = on_frames
+        self.on_lost = on_lost
+        self.capture = capture
+        self.parser = FrameParser()
+        self.transport: asyncio.Transport | None = None
+        self.last_received = time.monotonic()
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        self.last_received = time.monotonic()
+
+    def data_received(self, data: bytes):
+        self.last_received = time.monotonic()
+        if self.capture:
+            self.capture(data)
+        if frames := self.parser.feed(data):
+            self.on_frames(frames)
+
+    def connection_lost(self, exc: Exception | None):
+        self.transport = None
+        self.on_lost(exc)
@@ -0,0 +1,121 @@
+"""Signal maps parsed once per sender and shared by everything that needs them."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from pykwb.kwb import load_signal_maps
+
+from homeassistant.core import HomeAssistant
+
+from ....const import DATA_SIGNAL_MAPS, DOMAIN
+from .decoder import MessageDecoder
+
+# pykwb signal map source for each controller model
+SENDER_SOURCES = {"comfort_3": 10}
+DEFAULT_SOURCE = 10
+
+
+@dataclass(frozen=True, slots=True)
+class SignalDefinition:
+    """One signal of a message, parsed from a pykwb signal map tuple.
+
+    Binary signals ("b") store the bit index in offset. All others are
+    big-endian integers of length bytes at offset, multiplied by factor,
+    signed unless kind is "u".
+    """
+
+    message_id: int
+    name: str
+    key: str
+    kind: str
+    offset: int
+    length: int
+    factor: float | None
+    unit: str | None
+    state_class: str | None
+    device_class: str | None
+
+    @property
+    def is_binary(self) -> bool:
+        return self.kind == "b"
+
+    @classmethod
+    def from_tuple(
+        cls, message_id: int, signal_key: str, signal_definition: tuple
+    ) -> SignalDefinition:
+        def column(index):
+            return (
+                signal_definition[index] if index < len(signal_definition) else None
+            )
+
+        return cls(
+            message_id=message_id,
+            name=signal_key,
+            key=column(5) or signal_key.lower().replace(" ", "_"),
+            kind=signal_definition[0],
+            offset=column(1),
+            length=column(2),
+            factor=column(3),
+            unit=column(4),
+            state_class=column(6),
+            device_class=column(7),
+        )
+
+
+class SignalMap:
+    """All signals a sender can put on the bus, grouped by message id."""
+
+    def __init__(self, raw_signal_maps: list):
+        # pykwb wants the maps as it loaded them
+        self.raw = raw_signal_maps
+        # pykwb signal maps are a list indexed by message id. Unused ids are empty.
+        self.messages: dict[int, tuple[SignalDefinition, ...]] = {
+            message_id: tuple(
+                SignalDefinition.from_tuple(message_id, signal_key, signal_definition)
+                for signal_key, signal_definition in signal_map.items()
+            )
+            for message_id, signal_map in enumerate(raw_signal_maps)
+            if signal_map
+        }
+        self.signals: tuple[SignalDefinition, ...] = tuple(
+            signal for signals in self.messages.values() for signal in signals
+        )
+        # Compiled once here, so every heater of this model shares them
+        self.decoders: dict[int, MessageDecoder] = {
+            message_id: MessageDecoder(signals)
+            for message_id, signals in self.messages.items()
+        }
+        # Where to find each binary signal in the bitsets of its message
+        self.bit_positions: dict[str, tuple[int, int]] = {
+            key: (message_id, bit)
+            for message_id, decoder in self.decoders.items()
+            for bit, key in decoder.bit_keys.items()
+        }
+        # Message id that carries each signal
+        self.message_ids: dict[str, int] = {
+            signal.key: signal.message_id for signal in self.signals
+        }
+
+    def for_message(self, message_id: int) -> tuple[SignalDefinition, ...] | None:
+        return self.messages.get(message_id)
+
+
+def load_signal_map(sender: str | None) -> SignalMap:
+    """Load and parse signal maps. This reads files, so keep it off the event loop."""
+    return SignalMap(load_signal_maps(source=SENDER_SOURCES.get(sender, DEFAULT_SOURCE)))
+
+
+async def async_get_signal_map(
+    hass: HomeAssistant, model: str | None, sender: str | None
+) -> SignalMap:
+    """Return the shared signal map for a model and sender, loading it once."""
+    cache = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SIGNAL_MAPS, {})
+    if (model, sender) not in cache:
+        # Store the future, so concurrent setups wait for the same load
+        cache[(model, sender)] = hass.async_add_executor_job(load_signal_map, sender)
+    try:
+        return await cache[(model, sender)]
+    except Exception:
+        cache.pop((model, sender), None)
+        raise
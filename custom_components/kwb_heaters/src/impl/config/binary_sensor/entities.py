@@ -1,7 +1,6 @@
 from collections.abc import Iterable
 import logging
 
-from pykwb.kwb import load_signal_maps
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
 
 from homeassistant.config_entries import ConfigEntry
@@ -16,6 +15,7 @@ from ....api.platform.binary_sensor.binary_sensor_coordinated import (
 from ....api.platform.binary_sensor.binary_sensor_description import (
     BinarySensorDescription,
 )
+from ....impl.bus.signal_map import SignalMap
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,7 @@ def setup_entities(
     device_info: DeviceInfo,
     coordinator: DataUpdateCoordinator,
     config_entry: ConfigEntry,
+    signal_map: SignalMap,
 ) -> Iterable[Entity]:
     """Transform pykwb signal maps into KWBSensorEntityDescriptions.
 
@@ -37,36 +38,27 @@ def setup_entities(
 
     entities = []
 
-    # TODO refactor out this chunk. Same in sensors.entities.py
-    for signal_map in load_signal_maps(source=10):
-        if not signal_map:
-            continue
-        for signal_key, signal_definition in signal_map.items():
-            sensor_key = (
-                signal_definition[5]
-                if signal_definition[5] and signal_definition[5] != ""
-                else signal_key.lower().replace(" ", "_")
-            )
-            # TODO signal_key is a key, not a name. Translate it
-            sensor_name = f"{model} {unique_device_id} {signal_key}"
+    for signal in signal_map.signals:
+        # TODO signal.name is a key, not a name. Translate it
+        sensor_name = f"{model} {unique_device_id} {signal.name}"
 
-            if signal_definition[0] == "b":
-                # TODO should be from BinarySensorDeviceClass.
-                # Should be "running" or "problem"?
-                # device_class = signal_definition[5]
+        if signal.is_binary:
+            # TODO should be from BinarySensorDeviceClass.
+            # Should be "running" or "problem"?
+            # device_class = signal.device_class
 
-                entities.append(
-                    CoordinatedBinarySensor(
-                        coordinator=coordinator,
-                        device_info=device_info,
-                        entity_description=BinarySensorDescription(
-                            key=sensor_key,
-                            translation_key=sensor_key,
-                            name=sensor_name,
-                            device_class=BinarySensorDeviceClass.RUNNING,
-                        ),
-                    )
+            entities.append(
+                CoordinatedBinarySensor(
+                    coordinator=coordinator,
+                    device_info=device_info,
+                    entity_description=BinarySensorDescription(
+                        key=signal.key,
+                        translation_key=signal.key,
+                        name=sensor_name,
+                        device_class=BinarySensorDeviceClass.RUNNING,
+                    ),
                 )
+            )
 
     entities.append(
         CoordinatedBinarySensor(
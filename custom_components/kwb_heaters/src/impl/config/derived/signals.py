@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+import logging
+import time
+
+from homeassistant.util import dt as dt_util
+
+from ....impl.consumption import PelletCounter
+from ....impl.derived import DerivedSignal
+from ....impl.energy import EnergyIntegrator
+
+logger = logging.getLogger(__name__)
+
+
+class RunTimeCounter:
+    """Count the seconds the boiler was on, on monotonic time."""
+
+    def __init__(self, run_time: float):
+        self.run_time = run_time
+        self._last_time: float | None = None
+        self._was_on = False
+
+    def __call__(self, values: Mapping, now: float) -> float:
+        # Boiler was running since the last update
+        if self._was_on and self._last_time is not None:
+            self.run_time += max(now - self._last_time, 0)
+        self._was_on = bool(values.get("boiler_on"))
+        self._last_time = now
+        return self.run_time
+
+
+def setup_derived_signals(
+    heater_config: dict,
+    last_values: dict,
+    energy: EnergyIntegrator,
+    pellets: PelletCounter | None = None,
+    received_at: Callable[[str, float], float | None] | None = None,
+) -> list[DerivedSignal]:
+    """Declare the values calculated from decoded signals.
+
+    received_at returns when the value of a key was received, or None once
+    it went stale. Without it, values count as received whenever they are
+    evaluated.
+
+    Do not do any IO in this method, or in the functions it declares.
+    """
+
+    nominal_power = heater_config.get("boiler_nominal_power_kW")
+
+    def boiler_power(values: Mapping, now: float) -> float | None:
+        output = values.get("boiler_output")
+        if nominal_power is None or output is None:
+            return None
+        return nominal_power * output / 100
+
+    def boiler_on(values: Mapping, now: float) -> bool | None:
+        output = values.get("boiler_output")
+        return None if output is None else output > 0
+
+    def boiler_energy_output(values: Mapping, now: float) -> float:
+        output = values.get("boiler_output")
+        received = now if received_at is None else received_at("boiler_output", now)
+        if output is None or received is None:
+            # Nothing is integrated over the time the output was unknown
+            energy.interrupt()
+            return energy.energy
+        # The last output is held for at most max_gap after it was received
+        held_until = received + energy.max_gap
+        heat = energy.add_sample(output, min(now, held_until))
+        if now >= held_until:
+            energy.interrupt()
+        if heat:
+            # Pellets follow the fuel burned in this step, so they never
+            # have to be divided out of the lifetime total again
+            if pellets is not None:
+                pellets.add(heat / energy.efficiency, dt_util.now().date())
+        return energy.energy
+
+    signals = [
+        DerivedSignal(
+            key="boiler_nominal_power",
+            inputs=(),
+            f_compute=lambda values, now: nominal_power,
+        ),
+        DerivedSignal(
+            key="boiler_power",
+            inputs=("boiler_nominal_power", "boiler_output"),
+            f_compute=boiler_power,
+        ),
+        DerivedSignal(key="boiler_on", inputs=("boiler_output",), f_compute=boiler_on),
+        DerivedSignal(
+            key="boiler_run_time",
+            inputs=("boiler_on",),
+            f_compute=RunTimeCounter(last_values.get("boiler_run_time") or 0.0),
+            always=True,
+        ),
+        # Always evaluated, so a boiler output that does not change is
+        # still integrated
+        DerivedSignal(
+            key="boiler_energy_output",
+            inputs=("boiler_output",),
+            f_compute=boiler_energy_output,
+            always=True,
+        ),
+        DerivedSignal(
+            key="last_timestamp",
+            inputs=(),
+            f_compute=lambda values, now: time.time_ns() / 1000000,
+            always=True,
+        ),
+    ]
+    if pellets is None:
+        return signals
+
+    return signals + [
+        DerivedSignal(
+            key="pellet_consumption",
+            inputs=("boiler_energy_output",),
+            f_compute=lambda values, now: pellets.total,
+            always=True,
+        ),
+        # Always evaluated, so the buckets roll over while the boiler is idle
+        DerivedSignal(
+            key="pellet_consumption_today",
+            inputs=("pellet_consumption",),
+            f_compute=lambda values, now: pellets.today(dt_util.now().date()),
+            always=True,
+        ),
+        DerivedSignal(
+            key="pellet_consumption_month",
+            inputs=("pellet_consumption",),
+            f_compute=lambda values, now: pellets.this_month(dt_util.now().date()),
+            always=True,
+        ),
+    ]
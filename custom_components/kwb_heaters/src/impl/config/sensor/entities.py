@@ -3,22 +3,17 @@ from __future__ import annotations
 from collections.abc import Iterable
 import logging
 
-from pykwb.kwb import load_signal_maps
-
 from homeassistant.components.sensor.const import SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy, UnitOfPower, UnitOfTime
+from homeassistant.const import UnitOfEnergy, UnitOfMass, UnitOfPower, UnitOfTime
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .....const import (
-    CONF_BOILER_EFFICIENCY,
-    CONF_BOILER_NOMINAL_POWER,
-    CONF_PELLET_NOMINAL_ENERGY,
-)
+from .....const import CONF_PELLET_NOMINAL_ENERGY
 from ....api.platform.sensor.sensor_coordinated import CoordinatedSensor
 from ....api.platform.sensor.sensor_description import SensorDescription
+from ....impl.bus.signal_map import SignalMap
 from ....impl.platform.sensor.boiler_energy_sensor import KWBBoilerEnergySensor
 from ....impl.platform.sensor.pellet_consumption_sensor import (
     KWBPelletConsumptionSensor,
@@ -31,6 +26,7 @@ def setup_entities(
     device_info: DeviceInfo,
     coordinator: DataUpdateCoordinator,
     config_entry: ConfigEntry,
+    signal_map: SignalMap,
 ) -> Iterable[Entity]:
     """Transform pykwb signal maps into KWBSensorEntityDescriptions.
 
@@ -42,47 +38,31 @@ def setup_entities(
     model = device_info.get("model")
 
     # We will need these for later use at the end
-    boiler_nominal_power: float = config_entry.data.get(CONF_BOILER_NOMINAL_POWER)
-    boiler_efficiency: float = config_entry.data.get(CONF_BOILER_EFFICIENCY)
     pellet_energy: float = config_entry.data.get(CONF_PELLET_NOMINAL_ENERGY)
-    boiler_output_sensor: CoordinatedSensor = None
 
     entities = []
 
-    for signal_map in load_signal_maps(source=10):
-        if not signal_map:
-            continue
-        for signal_key, signal_definition in signal_map.items():
-            sensor_key = (
-                signal_definition[5]
-                if signal_definition[5] and signal_definition[5] != ""
-                else signal_key.lower().replace(" ", "_")
+    for signal in signal_map.signals:
+        # TODO signal.name is a key, not a name. Translate it
+        sensor_name = f"{model} {unique_device_id} {signal.name}"
+
+        if not signal.is_binary:
+            state_class = signal.state_class
+
+            sensor = CoordinatedSensor(
+                coordinator=coordinator,
+                device_info=device_info,
+                description=SensorDescription(
+                    key=signal.key,
+                    translation_key=signal.key,
+                    name=sensor_name,
+                    native_unit_of_measurement=signal.unit,
+                    device_class=signal.device_class,
+                    state_class=state_class,
+                ),
             )
-            # TODO signal_key is a key, not a name. Translate it
-            sensor_name = f"{model} {unique_device_id} {signal_key}"
-
-            if signal_definition[0] != "b":
-                unit = signal_definition[4]
-                state_class = signal_definition[6]
-                device_class = signal_definition[7]
-
-                sensor = CoordinatedSensor(
-                    coordinator=coordinator,
-                    device_info=device_info,
-                    description=SensorDescription(
-                        key=sensor_key,
-                        translation_key=sensor_key,
-                        name=sensor_name,
-                        native_unit_of_measurement=unit,
-                        device_class=device_class,
-                        state_class=state_class,
-                    ),
-                )
 
-                if sensor_key == "boiler_output":
-                    boiler_output_sensor = sensor
-
-                entities.append(sensor)
+            entities.append(sensor)
 
     # f_get_native_value: GetNativeValueType = (
     #     lambda sensor: sensor.coordinator.latest_scrape[sensor.entity_description.key],
@@ -167,43 +147,59 @@ def setup_entities(
         )
     )
 
-    # HACK Create KWBBoilerEnergySensor
-    # boiler_nominal_power = config_entry.data.get(CONF_BOILER_NOMINAL_POWER)
-    # boiler_efficiency = config_entry.data.get(CONF_BOILER_EFFICIENCY)
-    # boiler_output_sensor = list(
-    #     filter(lambda e: e.entity_description.key == "boiler_output", entities)
-    # ).pop()
-
+    # Integrated by the appliance on every boiler output sample. Without a
+    # state class, as the statistics of the lifetime counters are written
+    # by StatisticsWriter and the recorder must not compile them again.
     boiler_energy_sensor = KWBBoilerEnergySensor(
+        coordinator=coordinator,
         device_info=device_info,
-        boiler_nominal_power=boiler_nominal_power,
-        boiler_efficiency=boiler_efficiency,
-        boiler_output_sensor=boiler_output_sensor,
-        entity_description=SensorDescription(
+        description=SensorDescription(
             key="boiler_energy_output",
             translation_key="boiler_energy_output",
             name=f"{model} {unique_device_id} Boiler Energy Output",
             native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
             device_class=SensorDeviceClass.ENERGY,
-            state_class=SensorStateClass.TOTAL,
         ),
     )
     entities.append(boiler_energy_sensor)
 
-    entities.append(
-        KWBPelletConsumptionSensor(
-            device_info=device_info,
-            pellet_energy=pellet_energy,
-            boiler_energy_sensor=boiler_energy_sensor,
-            entity_description=SensorDescription(
-                key="pellet_consumption",
-                translation_key="pellet_consumption",
-                name=f"{model} {unique_device_id} Pellet Consumption",
-                native_unit_of_measurement="kg",
-                device_class=SensorDeviceClass.WEIGHT,
-                state_class=state_class,
-            ),
+    # Counted by the appliance from the fuel energy of every integration
+    # step. Without a state class, like the energy.
+    if pellet_energy:
+        entities.append(
+            KWBPelletConsumptionSensor(
+                coordinator=coordinator,
+                device_info=device_info,
+                description=SensorDescription(
+                    key="pellet_consumption",
+                    translation_key="pellet_consumption",
+                    name=f"{model} {unique_device_id} Pellet Consumption",
+                    native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+                    device_class=SensorDeviceClass.WEIGHT,
+                ),
+            )
         )
-    )
+        # Replace utility meters on top of the lifetime counter. They start
+        # from zero on every new day or month, which TOTAL_INCREASING
+        # statistics read as a meter reset.
+        for key, name in (
+            ("pellet_consumption_today", "Pellet Consumption Today"),
+            ("pellet_consumption_month", "Pellet Consumption This Month"),
+        ):
+            entities.append(
+                CoordinatedSensor(
+                    coordinator=coordinator,
+                    device_info=device_info,
+                    description=SensorDescription(
+                        key=key,
+                        translation_key=key,
+                        name=f"{model} {unique_device_id} {name}",
+                        native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+                        device_class=SensorDeviceClass.WEIGHT,
+                        state_class=SensorStateClass.TOTAL_INCREASING,
+                        entity_registry_enabled_default=False,
+                    ),
+                )
+            )
 
     return entities
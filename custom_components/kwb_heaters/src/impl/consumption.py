@@ -0,0 +1,65 @@
+"""Count pellet consumption from integrated fuel energy."""
+
+from datetime import date
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PelletCounter:
+    """Count the kg of pellets burned, lifetime and per day and month.
+
+    Fed with the fuel energy deltas of the energy integrator, so it never
+    has to divide a lifetime total again. The day and month buckets start
+    from zero when the date passed in rolls over.
+    """
+
+    def __init__(
+        self, pellet_energy: float, total: float = 0.0, buckets: dict | None = None
+    ):
+        # kWh per kg of pellets
+        self.pellet_energy = pellet_energy
+        self.total = total
+        buckets = buckets or {}
+        self._day: str | None = buckets.get("day")
+        self._day_total: float = buckets.get("day_total", 0.0)
+        self._month: str | None = buckets.get("month")
+        self._month_total: float = buckets.get("month_total", 0.0)
+
+    def restore(self, total: float):
+        """Continue from a saved lifetime total. Counters never go backwards."""
+        self.total = max(self.total, total)
+
+    def add(self, fuel_energy: float, day: date) -> float:
+        """Count the pellets burned for fuel_energy kWh and return the kg."""
+        kg = fuel_energy / self.pellet_energy
+        self.total += kg
+        self._roll_over(day)
+        self._day_total += kg
+        self._month_total += kg
+        return kg
+
+    def today(self, day: date) -> float:
+        """Return the kg burned on day."""
+        self._roll_over(day)
+        return self._day_total
+
+    def this_month(self, day: date) -> float:
+        """Return the kg burned in the month of day."""
+        self._roll_over(day)
+        return self._month_total
+
+    def buckets(self) -> dict:
+        """Return the day and month buckets to persist."""
+        return {
+            "day": self._day,
+            "day_total": self._day_total,
+            "month": self._month,
+            "month_total": self._month_total,
+        }
+
+    def _roll_over(self, day: date):
+        if (key := day.isoformat()) != self._day:
+            self._day, self._day_total = key, 0.0
+        if (key := key[:7]) != self._month:
+            self._month, self._month_total = key, 0.0
@@ -0,0 +1,74 @@
+"""Persist the lifetime counters and last values of a heater across restarts."""
+
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from ...const import COUNTER_SAVE_DELAY, DOMAIN
+
+logger = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class CounterStore:
+    """Checkpoint the counters of one heater in .storage.
+
+    Saves are batched. Every schedule within COUNTER_SAVE_DELAY of the
+    first ends up in one write, made with the counters at write time.
+    """
+
+    # Last part of the .storage file name
+    storage_name = "counters"
+
+    def __init__(self, hass: HomeAssistant, unique_key: str):
+        self._store: Store[dict] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{unique_key}.{self.storage_name}"
+        )
+        self._counters: Callable[[], dict] | None = None
+        self._save_scheduled = False
+
+    async def async_load(self) -> dict:
+        """Return the saved counters, or an empty dict."""
+        try:
+            return await self._store.async_load() or {}
+        except Exception as e:
+            logger.error(
+                "Failed loading %s, starting over", self.storage_name, exc_info=e
+            )
+            return {}
+
+    def attach(self, counters: Callable[[], dict]):
+        """Set the function that returns the counters to save."""
+        self._counters = counters
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the counters within COUNTER_SAVE_DELAY, unless a save is pending."""
+        if self._counters is None or self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data_to_save, COUNTER_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Save the counters now."""
+        if self._counters is None:
+            return
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._save_scheduled = False
+        return self._counters()
+
+
+class SnapshotStore(CounterStore):
+    """Checkpoint the last values of one heater in .storage.
+
+    Lets entities start with the last known values while the heater is
+    still being reached. Saves are batched like those of the counters.
+    """
+
+    storage_name = "snapshot"
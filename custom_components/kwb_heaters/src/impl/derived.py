@@ -0,0 +1,110 @@
+"""Calculate derived values from decoded signals in dependency order."""
+
+from collections.abc import Callable, Collection, Iterable, Mapping
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Stands in for a key that has no value yet
+_MISSING = object()
+
+
+@dataclass(frozen=True, slots=True)
+class DerivedSignal:
+    """Declare a value calculated from other values.
+
+    f_compute is called with all current values and the monotonic time of
+    the update, and returns the new value of key. It runs whenever one of
+    inputs was updated, or on every update if always is set.
+
+    Signals with always set move on with time, like counters. They are
+    evaluated even when no value changed, and are kept in DerivedGraph.live
+    instead of the values, so they never make the values change.
+    """
+
+    key: str
+    inputs: tuple[str, ...]
+    f_compute: Callable[[Mapping, float], Any]
+    always: bool = False
+
+
+class DerivedGraph:
+    """Evaluate derived signals in topological order.
+
+    Only signals downstream of updated keys are computed, and a derived
+    value that came out unchanged does not wake its dependents.
+    Raises graphlib.CycleError if the signals depend on each other in a loop,
+    and ValueError if a signal depends on one that is always evaluated.
+    """
+
+    def __init__(self, signals: Iterable[DerivedSignal]):
+        by_key = {signal.key: signal for signal in signals}
+        graph = TopologicalSorter(
+            {
+                key: [input for input in signal.inputs if input in by_key]
+                for key, signal in by_key.items()
+            }
+        )
+        order = [by_key[key] for key in graph.static_order()]
+        for signal in order:
+            if not signal.always and any(
+                input in by_key and by_key[input].always for input in signal.inputs
+            ):
+                raise ValueError(
+                    f"{signal.key} depends on a signal that is always evaluated"
+                )
+        # Nothing depends on the always evaluated signals but their own kind,
+        # so they can all run after the others
+        self.order: tuple[DerivedSignal, ...] = tuple(
+            signal for signal in order if not signal.always
+        )
+        self.live_order: tuple[DerivedSignal, ...] = tuple(
+            signal for signal in order if signal.always
+        )
+        self.keys = frozenset(by_key)
+        self.live_keys = frozenset(signal.key for signal in self.live_order)
+        # Keys that are not derived, which each signal is calculated from
+        self.sources: dict[str, frozenset[str]] = {}
+        for signal in order:
+            self.sources[signal.key] = frozenset().union(
+                *(self.sources.get(input, (input,)) for input in signal.inputs)
+            )
+        # Current values of the always evaluated signals
+        self.live: dict[str, Any] = {}
+        self._evaluated = False
+
+    def evaluate(self, values: dict, updated: Collection[str], now: float) -> set[str]:
+        """Compute the signals affected by updated keys into values.
+
+        The first call computes every signal. Always evaluated signals are
+        computed into live. Returns the derived keys whose value changed.
+        """
+        dirty = set(updated)
+        changed = set()
+        for signal in self.order:
+            if self._evaluated and dirty.isdisjoint(signal.inputs):
+                continue
+            value = signal.f_compute(values, now)
+            if values.get(signal.key, _MISSING) != value:
+                values[signal.key] = value
+                dirty.add(signal.key)
+                changed.add(signal.key)
+        self._evaluated = True
+        return changed | self.advance(values, now)
+
+    def advance(self, values: Mapping, now: float) -> set[str]:
+        """Compute only the always evaluated signals into live.
+
+        For updates that changed no value. Returns the keys whose value changed.
+        """
+        live = self.live
+        changed = set()
+        for signal in self.live_order:
+            value = signal.f_compute(values, now)
+            if live.get(signal.key, _MISSING) != value:
+                live[signal.key] = value
+                changed.add(signal.key)
+        return changed
@@ -0,0 +1,128 @@
+"""Integrate boiler output into lifetime energy."""
+
+from collections.abc import Sequence
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+class EnergyIntegrator:
+    """Integrate boiler output samples into kWh with the trapezoidal rule.
+
+    Samples are boiler output in percent of nominal power, stamped with
+    monotonic seconds so wall clock jumps can't skew the result. Gaps
+    longer than max_gap are integrated as if they were max_gap long. energy
+    is the heat the boiler put out, fuel_energy the energy burned for it
+    at the configured efficiency. Both are summed with Neumaier's
+    compensated summation, so millions of tiny steps don't lose precision.
+    """
+
+    def __init__(
+        self,
+        nominal_power: float | None,
+        efficiency: float | None,
+        max_gap: float,
+        energy: float = 0.0,
+    ):
+        # kW at 100 % output
+        self.nominal_power = nominal_power or 0.0
+        # Fraction of fuel energy turned into heat
+        self.efficiency = (efficiency or 100.0) / 100
+        self.max_gap = max_gap
+        self._energy = _CompensatedSum(energy)
+        self._fuel_energy = _CompensatedSum(energy / self.efficiency)
+        self._last_time: float | None = None
+        self._last_power: float | None = None
+
+    @property
+    def energy(self) -> float:
+        """Return the lifetime heat output in kWh."""
+        return self._energy.value
+
+    @property
+    def fuel_energy(self) -> float:
+        """Return the lifetime fuel energy in kWh."""
+        return self._fuel_energy.value
+
+    def restore(self, energy: float):
+        """Continue from a saved lifetime energy. Counters never go backwards."""
+        if energy > self.energy:
+            self._energy = _CompensatedSum(energy)
+            self._fuel_energy = _CompensatedSum(energy / self.efficiency)
+
+    def add_sample(self, output: float, timestamp: float) -> float:
+        """Integrate up to a new boiler output sample and return the kWh added."""
+        power = self.nominal_power * output / 100
+        last_time, last_power = self._last_time, self._last_power
+        self._last_time, self._last_power = timestamp, power
+        if last_time is None or timestamp <= last_time:
+            return 0.0
+
+        hours = min(timestamp - last_time, self.max_gap) / 3600
+        delta = (last_power + power) / 2 * hours
+        self._energy.add(delta)
+        self._fuel_energy.add(delta / self.efficiency)
+        return delta
+
+    def interrupt(self):
+        """Forget the last sample, so nothing is integrated up to the next one."""
+        self._last_time = self._last_power = None
+
+    def add_samples(
+        self, outputs: Sequence[float], timestamps: Sequence[float]
+    ) -> float:
+        """Integrate a batch of samples like add_sample, and return the kWh added.
+
+        Continues from the last sample, so history can be fed batch by batch.
+        The steps of a batch are summed exactly with math.fsum.
+        """
+        if not outputs:
+            return 0.0
+        scale = self.nominal_power / 100
+        powers = [output * scale for output in outputs]
+        if self._last_time is None:
+            start_powers, start_times = powers[:-1], timestamps[:-1]
+            end_powers, end_times = powers[1:], timestamps[1:]
+        else:
+            start_powers = [self._last_power, *powers[:-1]]
+            start_times = [self._last_time, *timestamps[:-1]]
+            end_powers, end_times = powers, timestamps
+        self._last_time, self._last_power = timestamps[-1], powers[-1]
+
+        max_gap = self.max_gap
+        delta = (
+            math.fsum(
+                (p0 + p1) * min(t1 - t0, max_gap)
+                for p0, p1, t0, t1 in zip(
+                    start_powers, end_powers, start_times, end_times
+                )
+                if t1 > t0
+            )
+            / 7200
+        )
+        self._energy.add(delta)
+        self._fuel_energy.add(delta / self.efficiency)
+        return delta
+
+
+class _CompensatedSum:
+    """Running float sum that carries the rounding error of every addition."""
+
+    __slots__ = ("_sum", "_compensation")
+
+    def __init__(self, value: float = 0.0):
+        self._sum = float(value)
+        self._compensation = 0.0
+
+    @property
+    def value(self) -> float:
+        return self._sum + self._compensation
+
+    def add(self, value: float):
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._compensation += (self._sum - total) + value
+        else:
+            self._compensation += (value - total) + self._sum
+        self._sum = total
@@ -0,0 +1,69 @@
+"""Hand the appliance validated by the config flow over to setup.
+
+An appliance with a persistent connection is offered while it still
+streams, so setup does not have to connect again. If setup doesn't take
+it in time, its stream is closed.
+"""
+
+from functools import partial
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from ...const import DATA_HANDOFF, DOMAIN, HANDOFF_TTL
+
+if TYPE_CHECKING:
+    from .appliance import Appliance
+
+logger = logging.getLogger(__name__)
+
+HandoffKey = tuple[str, str, int]
+
+
+@callback
+def async_offer_appliance(hass: HomeAssistant, appliance: "Appliance") -> None:
+    """Keep a validated appliance for HANDOFF_TTL seconds, so setup can adopt it."""
+    handoff = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_HANDOFF, {})
+    reader = appliance.async_reader
+    key = (appliance.unique_id, reader.host, reader.port)
+    if key in handoff:
+        # Replaced by a newer validation
+        previous, cancel_expiry = handoff.pop(key)
+        cancel_expiry()
+        _async_release(hass, previous)
+    handoff[key] = (
+        appliance,
+        async_call_later(hass, HANDOFF_TTL, partial(_async_expire, hass, key)),
+    )
+
+
+@callback
+def async_take_appliance(
+    hass: HomeAssistant, unique_id: str, host: str, port: int
+) -> "Appliance | None":
+    """Return the appliance the config flow validated for a heater, once."""
+    handoff = hass.data.get(DOMAIN, {}).get(DATA_HANDOFF, {})
+    offered = handoff.pop((unique_id, host, port), None)
+    if offered is None:
+        return None
+    appliance, cancel_expiry = offered
+    cancel_expiry()
+    return appliance
+
+
+@callback
+def _async_expire(hass: HomeAssistant, key: HandoffKey, _now) -> None:
+    if offered := hass.data.get(DOMAIN, {}).get(DATA_HANDOFF, {}).pop(key, None):
+        logger.debug("Validated appliance %s was not set up", key)
+        _async_release(hass, offered[0])
+
+
+@callback
+def _async_release(hass: HomeAssistant, appliance: "Appliance") -> None:
+    """Close the stream of an appliance nobody took, freeing the gateway."""
+    hass.async_create_task(
+        appliance.async_stop_streaming(),
+        f"{DOMAIN}_{appliance.unique_key}_release",
+    )
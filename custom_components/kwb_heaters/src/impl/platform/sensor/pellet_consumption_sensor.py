@@ -1,33 +1,21 @@
-from homeassistant.helpers.device_registry import DeviceInfo
+import logging
 
-from ....api.platform.sensor.sensor import Sensor
-from ....api.platform.sensor.sensor_description import SensorDescription
-from .boiler_energy_sensor import KWBBoilerEnergySensor
+from ....api.platform.sensor.sensor_coordinated import CoordinatedSensor
 
+logger = logging.getLogger(__name__)
 
-class KWBPelletConsumptionSensor(Sensor):
-    """Calculate lifetime pellet consumption."""
 
-    def __init__(
-        self,
-        entity_description: SensorDescription,
-        device_info: DeviceInfo,
-        pellet_energy: float,
-        boiler_energy_sensor: KWBBoilerEnergySensor,
-    ):
-        super().__init__(entity_description=entity_description, device_info=device_info)
+class KWBPelletConsumptionSensor(CoordinatedSensor):
+    """Lifetime pellet consumption.
 
-        self._attr_available = False
-        self._attr_should_poll = True
-        self.pellet_energy = pellet_energy
-        self.boiler_energy_sensor = boiler_energy_sensor
+    The appliance counts pellets from the fuel energy of every integration
+    step. This sensor only shows the result, and hands its restored state
+    to the counter so it continues across restarts.
+    """
 
-    async def async_update(self):
-        """Update sensor value."""
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
 
-        if not self.boiler_energy_sensor.state:
-            return
-
-        boiler_energy: int = self.boiler_energy_sensor.state
-        self._attr_native_value = boiler_energy / self.pellet_energy
-        self._attr_available = True
+        pellets = self.coordinator.data.pellets
+        if self._recovered and self._attr_native_value is not None and pellets:
+            pellets.restore(float(self._attr_native_value))
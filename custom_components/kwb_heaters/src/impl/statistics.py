@@ -0,0 +1,169 @@
+"""Write hourly long-term statistics of the lifetime counters of a heater."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import csv
+from datetime import datetime
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.const import UnitOfEnergy, UnitOfMass
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from ...const import DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+
+logger = logging.getLogger(__name__)
+
+# Lifetime counters that get statistics, with their name and unit
+STATISTIC_COUNTERS = {
+    "boiler_energy_output": ("Boiler Energy Output", UnitOfEnergy.KILO_WATT_HOUR),
+    "pellet_consumption": ("Pellet Consumption", UnitOfMass.KILOGRAMS),
+}
+
+
+class StatisticsWriter:
+    """Aggregate lifetime counters into hourly statistics.
+
+    Every counter becomes an external statistic with id
+    kwb_heaters:<unique_key>_<counter>. An hour is written once the first
+    update of the next hour arrives, with the last counter value seen in
+    it as state. The sum is what the counter grew since the series started,
+    so it is 0 at the first value ever seen and continues from the last
+    imported row after a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, unique_key: str, name: str):
+        self.hass = hass
+        self._metadata: dict[str, StatisticMetaData] = {
+            key: {
+                "has_mean": False,
+                "has_sum": True,
+                "name": f"{name} {counter_name}",
+                "source": DOMAIN,
+                "statistic_id": f"{DOMAIN}:{unique_key}_{key}",
+                "unit_of_measurement": unit,
+            }
+            for key, (counter_name, unit) in STATISTIC_COUNTERS.items()
+        }
+        # Counter of each statistic id
+        self.statistic_ids = {
+            metadata["statistic_id"]: key for key, metadata in self._metadata.items()
+        }
+        self._values: Callable[[], dict] | None = None
+        self._hour: datetime | None = None
+        # (state, sum) of each counter at the end of the hour in progress
+        self._last: dict[str, tuple[float, float]] = {}
+        # Counter value where each sum is 0, and the last sum of each counter
+        self._offsets: dict[str, float] = {}
+        self._sums: dict[str, float] = {}
+
+    async def async_load(self):
+        """Continue the sums of the rows already imported."""
+        # Imported late, so the bench tools can load this package without
+        # the requirements of the recorder
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        for key, metadata in self._metadata.items():
+            statistic_id = metadata["statistic_id"]
+            last = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics, self.hass, 1, statistic_id, True, {"state", "sum"}
+            )
+            if rows := last.get(statistic_id):
+                state, last_sum = rows[0].get("state"), rows[0].get("sum")
+                if state is not None and last_sum is not None:
+                    self._offsets[key] = state - last_sum
+                    self._sums[key] = last_sum
+
+    def attach(self, values: Callable[[], dict]):
+        """Set the function that returns the current counter values."""
+        self._values = values
+
+    @callback
+    def async_update(self) -> None:
+        """Take the current counter values, and write the hour that ended."""
+        if self._values is None:
+            return
+        hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if self._hour is not None and hour != self._hour:
+            self._async_write()
+        self._hour = hour
+        values = self._values()
+        for key in self._metadata:
+            if (value := values.get(key)) is None:
+                continue
+            offset = self._offsets.setdefault(key, value)
+            last_sum = self._sums.get(key, 0.0)
+            if value - offset < last_sum:
+                # The counter went backwards, e.g. its store was lost. Keep
+                # the sum where it was instead of booking a negative increase.
+                offset = self._offsets[key] = value - last_sum
+            self._sums[key] = value - offset
+            self._last[key] = (value, value - offset)
+
+    @callback
+    def async_flush(self) -> None:
+        """Write the hour in progress. It is overwritten if updates continue."""
+        if self._hour is not None:
+            self._async_write()
+
+    @callback
+    def async_import(self, statistic_id: str, rows: list[StatisticData]) -> None:
+        """Write rows over those of the same hours, e.g. rebuilt by bench/backfill.py.
+
+        Sums of later updates continue from the last row.
+        """
+        # Imported late, so the bench tools can load this package without
+        # the requirements of the recorder
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        key = self.statistic_ids[statistic_id]
+        async_add_external_statistics(self.hass, self._metadata[key], rows)
+        state, last_sum = rows[-1]["state"], rows[-1]["sum"]
+        self._offsets[key] = state - last_sum
+        self._sums[key] = last_sum
+
+    @callback
+    def _async_write(self):
+        # Imported late, so the bench tools can load this package without
+        # the requirements of the recorder
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        for key, (state, total) in self._last.items():
+            async_add_external_statistics(
+                self.hass,
+                self._metadata[key],
+                [{"start": self._hour, "state": state, "sum": total}],
+            )
+
+
+def read_statistics_csv(path: str) -> dict[str, list[StatisticData]]:
+    """Read the rows of every statistic id from a CSV of bench/backfill.py.
+
+    Rows come out oldest first. Do not call this from the event loop.
+    """
+    rows: dict[str, list[StatisticData]] = {}
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            rows.setdefault(row["statistic_id"], []).append(
+                {
+                    "start": datetime.fromisoformat(row["start"]),
+                    "state": float(row["state"]),
+                    "sum": float(row["sum"]),
+                }
+            )
+    for statistic_rows in rows.values():
+        statistic_rows.sort(key=lambda row: row["start"])
+    return rows
@@ -0,0 +1,45 @@
+"""Fixtures shared by the tests."""
+
+import pytest
+import pytest_asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.kwb_heaters.src.impl.appliance import Appliance
+from custom_components.kwb_heaters.src.impl.bus.signal_map import SignalMap
+
+# pykwb signal maps are a list indexed by message id
+RAW_SIGNAL_MAPS = [{}] * 32 + [
+    {
+        "Boiler Output": ("u", 0, 1, 1, "%", "boiler_output"),
+        "Temperature": ("s", 1, 2, 0.1, "°C", "temperature"),
+        "Pump": ("b", 24, 0, None, None, "pump"),
+    },
+    {
+        "Alarm": ("b", 0, 0, None, None, "alarm"),
+    },
+]
+
+APPLIANCE_CONFIG = {
+    "unique_id": "Test Heater",
+    "host": "localhost",
+    "port": 8899,
+    "boiler_nominal_power_kW": 20,
+}
+
+
+@pytest.fixture
+def signal_map():
+    return SignalMap(RAW_SIGNAL_MAPS)
+
+
+@pytest.fixture
+def appliance(signal_map):
+    return Appliance(APPLIANCE_CONFIG, signal_map)
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    hass = HomeAssistant(str(tmp_path))
+    yield hass
+    await hass.async_stop(force=True)
@@ -0,0 +1,114 @@
+"""Tests for how an appliance turns frames into snapshots."""
+
+import pytest
+
+from custom_components.kwb_heaters.src.impl.appliance import Appliance
+from custom_components.kwb_heaters.src.impl.bus.frame import Frame
+
+from .conftest import APPLIANCE_CONFIG
+
+
+def test_changed_frame_makes_a_snapshot(appliance):
+    keys = set()
+    appliance.message_listener = lambda message_id, changed: keys.update(changed)
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+
+    snapshot = appliance.snapshot
+    assert snapshot.generation == 1
+    assert snapshot.values["boiler_output"] == 50
+    assert snapshot.values["temperature"] == pytest.approx(20.0)
+    assert snapshot.values["boiler_power"] == 10
+    assert appliance.is_on("pump")
+    assert {"boiler_output", "temperature", "boiler_power"} <= keys
+    # Values that move on with time are not part of the snapshot
+    assert "boiler_energy_output" not in snapshot.values
+    assert appliance.value("boiler_energy_output") == 0
+
+
+def test_update_without_changes_keeps_the_generation(appliance):
+    appliance._update({"boiler_output": 50}, {32: 1})
+    generation = appliance.snapshot.generation
+
+    changed = appliance._update({"boiler_output": 50}, {32: 1})
+    assert appliance.snapshot.generation == generation
+    assert changed <= appliance.derived.live_keys
+
+    changed = appliance._update({"boiler_output": 60}, {32: 1})
+    assert appliance.snapshot.generation == generation + 1
+    assert {"boiler_output", "boiler_power"} <= changed
+
+
+def test_restored_snapshot_is_replaced_by_the_first_update(appliance):
+    appliance.restore_snapshot(
+        {
+            "values": {"boiler_output": 50},
+            "bits": {"32": 1},
+            "live": {"boiler_energy_output": 12.5},
+            "saved": 0,
+        }
+    )
+    assert appliance.is_restored
+    assert appliance.value("boiler_energy_output") == 12.5
+
+    appliance._update({"boiler_output": 50}, {32: 1})
+    assert not appliance.is_restored
+    assert appliance.snapshot.generation == 1
+
+
+def test_repeated_frame_keeps_the_snapshot(appliance):
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    snapshot = appliance.snapshot
+    calls = []
+    appliance.message_listener = lambda message_id, changed: calls.append(changed)
+
+    appliance.handle_frames([Frame(32, 1, bytes([50, 0, 200, 1]))] * 3)
+
+    assert appliance.snapshot is snapshot
+    assert calls == []
+    assert appliance.last_received > snapshot.timestamp
+
+
+def make_stale(appliance, message_id):
+    message = appliance.message_cache[message_id]
+    appliance.message_cache[message_id] = message._replace(
+        received=message.received - 10**6
+    )
+
+
+def test_calculated_values_go_stale_with_their_sources(appliance):
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    appliance.handle_frames([Frame(33, 0, bytes([0]))])
+    assert appliance.is_fresh("boiler_power")
+    assert {"boiler_output", "boiler_power"} <= set(appliance.message_keys[32])
+
+    make_stale(appliance, 32)
+    assert not appliance.is_fresh("boiler_output")
+    assert not appliance.is_fresh("boiler_power")
+    assert appliance.signal_age("boiler_power") >= 10**6
+    assert appliance.is_fresh("alarm")
+
+
+def test_stale_output_is_not_integrated(appliance):
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    received = appliance.message_cache[32].received
+    values = appliance.snapshot.values
+
+    # 10 kW held for a minute, then the message goes stale
+    appliance.derived.advance(values, received + 60)
+    assert appliance.value("boiler_energy_output") == pytest.approx(10 / 60)
+    assert appliance.received_at("boiler_power", received + 200) is None
+    appliance.derived.advance(values, received + 200)
+    appliance.derived.advance(values, received + 300)
+    assert appliance.value("boiler_energy_output") == pytest.approx(10 / 60)
+
+
+def test_output_is_held_for_at_most_max_gap(signal_map):
+    appliance = Appliance({**APPLIANCE_CONFIG, "max_integration_gap": 30}, signal_map)
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    received = appliance.message_cache[32].received
+    values = appliance.snapshot.values
+
+    appliance.derived.advance(values, received + 20)
+    appliance.derived.advance(values, received + 60)
+    appliance.derived.advance(values, received + 80)
+    assert appliance.value("boiler_energy_output") == pytest.approx(10 * 30 / 3600)
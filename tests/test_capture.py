@@ -0,0 +1,76 @@
+"""Tests for recording and reading capture files."""
+
+import pytest
+
+from custom_components.kwb_heaters.src.impl.bus.capture import (
+    CaptureByteReader,
+    CaptureWriter,
+    is_capture,
+    iter_records,
+)
+
+
+def read_records(path):
+    with open(path, "rb") as file:
+        records = iter_records(file.read())
+        return [(timestamp, bytes(chunk)) for timestamp, chunk in records]
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    writer = CaptureWriter(path, max_bytes=1 << 20, backup_count=1)
+    writer.append(b"\x02\x02abc", timestamp=1)
+    writer.append(b"", timestamp=2)
+    writer.flush()
+    writer.append(b"def", timestamp=3)
+    writer.write(writer.take())
+
+    assert is_capture(path)
+    assert read_records(path) == [(1, b"\x02\x02abc"), (2, b""), (3, b"def")]
+    assert writer.pending == 0
+
+
+def test_cut_off_record_ends_the_capture(tmp_path):
+    path = tmp_path / "capture.bin"
+    writer = CaptureWriter(str(path), max_bytes=1 << 20, backup_count=1)
+    writer.append(b"complete", timestamp=1)
+    writer.append(b"cut off", timestamp=2)
+    writer.flush()
+    path.write_bytes(path.read_bytes()[:-2])
+
+    assert read_records(path) == [(1, b"complete")]
+
+
+def test_rotation(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    writer = CaptureWriter(path, max_bytes=64, backup_count=2)
+    for timestamp in range(3):
+        writer.append(bytes(40), timestamp=timestamp)
+        writer.flush()
+
+    assert read_records(path) == [(2, bytes(40))]
+    assert read_records(f"{path}.1") == [(1, bytes(40))]
+    assert read_records(f"{path}.2") == [(0, bytes(40))]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "raw.bin"
+    path.write_bytes(b"\x02\x02raw bytes")
+    assert not is_capture(str(path))
+    with pytest.raises(ValueError):
+        list(iter_records(path.read_bytes()))
+
+
+@pytest.mark.parametrize("size", [1, 3, 100])
+def test_byte_reader_replays_the_stream(tmp_path, size):
+    path = str(tmp_path / "capture.bin")
+    writer = CaptureWriter(path, max_bytes=1 << 20, backup_count=1)
+    for index in range(10):
+        writer.append(bytes(range(index * 5, index * 5 + 5)), timestamp=index)
+    writer.flush()
+
+    reader = CaptureByteReader(path)
+    reader.open()
+    data = b"".join(iter(lambda: reader.read(size), b""))
+    reader.close()
+    assert data == bytes(range(50))
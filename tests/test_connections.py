@@ -0,0 +1,167 @@
+"""Tests for the connection manager shared by all heaters."""
+
+import asyncio
+import logging
+
+import pytest
+import pytest_asyncio
+
+from custom_components.kwb_heaters.const import CAPTURE_FLUSH_SIZE
+from custom_components.kwb_heaters.src.impl.appliance import Appliance
+from custom_components.kwb_heaters.src.impl.bus.connections import ConnectionManager
+from custom_components.kwb_heaters.src.impl.bus.frame import encode_frame
+
+from .conftest import APPLIANCE_CONFIG
+
+
+class Gateway:
+    """Local TCP server standing in for an RS485 gateway."""
+
+    def __init__(self):
+        self.clients: list[asyncio.StreamWriter] = []
+        # Clients that hung up
+        self.closed = 0
+        self.server: asyncio.Server | None = None
+        self.port: int | None = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._accept, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for writer in self.clients:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def send(self, data: bytes):
+        for writer in self.clients:
+            if not writer.is_closing():
+                writer.write(data)
+
+    async def _accept(self, reader, writer):
+        self.clients.append(writer)
+        await reader.read()
+        self.closed += 1
+
+
+@pytest_asyncio.fixture
+async def gateway():
+    gateway = Gateway()
+    await gateway.start()
+    yield gateway
+    await gateway.stop()
+
+
+async def wait_for(condition, timeout=2):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def make_appliance(gateway, signal_map, manager, **config):
+    return Appliance(
+        {**APPLIANCE_CONFIG, "host": "127.0.0.1", "port": gateway.port, **config},
+        signal_map,
+        manager,
+    )
+
+
+@pytest.mark.asyncio
+async def test_add_streams_frames_to_the_appliance(hass, gateway, signal_map):
+    manager = ConnectionManager(hass)
+    appliance = make_appliance(gateway, signal_map, manager)
+
+    manager.add(appliance)
+    assert appliance in manager
+    await wait_for(lambda: gateway.clients)
+    gateway.send(encode_frame(32, 0, bytes([50, 0, 200, 1])))
+    await wait_for(lambda: appliance.snapshot.generation)
+    assert appliance.value("boiler_output") == 50
+
+    await manager.async_remove(appliance)
+    assert appliance not in manager
+    await wait_for(lambda: gateway.closed == 1)
+
+
+@pytest.mark.asyncio
+async def test_transfer_keeps_the_connection(hass, gateway, signal_map):
+    manager = ConnectionManager(hass)
+    old = make_appliance(gateway, signal_map, manager)
+    manager.add(old)
+    await wait_for(lambda: gateway.clients)
+
+    new = make_appliance(gateway, signal_map, manager)
+    assert manager.transfer(old, new)
+    assert new in manager
+    assert old not in manager
+    assert not manager.transfer(old, new)
+
+    gateway.send(encode_frame(32, 0, bytes([50, 0, 200, 1])))
+    await wait_for(lambda: new.snapshot.generation)
+    assert old.snapshot.generation == 0
+    assert len(gateway.clients) == 1
+
+    # Only the owner of a connection can close it
+    await manager.async_remove(old)
+    assert new in manager
+    await manager.async_remove(new)
+
+
+@pytest.mark.asyncio
+async def test_add_replaces_the_connection_of_the_same_heater(
+    hass, gateway, signal_map
+):
+    manager = ConnectionManager(hass)
+    old = make_appliance(gateway, signal_map, manager)
+    manager.add(old)
+    await wait_for(lambda: gateway.clients)
+
+    new = make_appliance(gateway, signal_map, manager)
+    manager.add(new)
+    assert old not in manager
+    await wait_for(lambda: len(gateway.clients) == 2)
+    await wait_for(lambda: gateway.closed == 1)
+    await manager.async_remove(new)
+
+
+@pytest.mark.asyncio
+async def test_connect_errors_do_not_end_the_supervisor(
+    hass, gateway, signal_map, monkeypatch, caplog
+):
+    manager = ConnectionManager(hass)
+
+    def broken_protocol(connection):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(manager, "_create_protocol", broken_protocol)
+    appliance = make_appliance(gateway, signal_map, manager)
+    with caplog.at_level(logging.ERROR):
+        manager.add(appliance)
+        await wait_for(lambda: "Error connecting" in caplog.text)
+    await asyncio.sleep(0)
+    assert not manager._task.done()
+    await manager.async_remove(appliance)
+
+
+@pytest.mark.asyncio
+async def test_supervisor_writes_captures(hass, gateway, signal_map, tmp_path):
+    manager = ConnectionManager(hass)
+    path = tmp_path / "capture.bin"
+    appliance = make_appliance(gateway, signal_map, manager, capture_path=str(path))
+    manager.add(appliance)
+    await wait_for(lambda: gateway.clients)
+
+    gateway.send(bytes(CAPTURE_FLUSH_SIZE))
+    await wait_for(path.exists, timeout=3)
+    await appliance.async_stop_streaming()
+    assert path.stat().st_size > CAPTURE_FLUSH_SIZE
+
+
+def test_phases_spread_heaters():
+    manager = ConnectionManager(None)
+    phases = [manager.phase(key) for key in "abcd"]
+    assert phases[0] == 0
+    assert len(set(phases)) == 4
+    assert all(0 <= phase < 1 for phase in phases)
+    assert manager.phase("b") == phases[1]
@@ -0,0 +1,40 @@
+"""Tests for counting pellet consumption."""
+
+from datetime import date
+
+from custom_components.kwb_heaters.src.impl.consumption import (
+    PelletCounter,
+)
+
+
+def test_buckets_roll_over():
+    pellets = PelletCounter(pellet_energy=5)
+    pellets.add(10, date(2024, 1, 31))
+    pellets.add(5, date(2024, 1, 31))
+    assert pellets.today(date(2024, 1, 31)) == 3
+    assert pellets.this_month(date(2024, 1, 31)) == 3
+
+    pellets.add(10, date(2024, 2, 1))
+    assert pellets.today(date(2024, 2, 1)) == 2
+    assert pellets.this_month(date(2024, 2, 1)) == 2
+    assert pellets.total == 5
+
+    # Reading on a later day rolls over without anything burned
+    assert pellets.today(date(2024, 2, 2)) == 0
+    assert pellets.this_month(date(2024, 2, 2)) == 2
+
+
+def test_buckets_survive_a_restart():
+    pellets = PelletCounter(pellet_energy=5)
+    pellets.add(10, date(2024, 1, 31))
+    restored = PelletCounter(5, total=pellets.total, buckets=pellets.buckets())
+    assert restored.today(date(2024, 1, 31)) == 2
+    assert restored.this_month(date(2024, 1, 31)) == 2
+
+
+def test_restore_never_goes_backwards():
+    pellets = PelletCounter(pellet_energy=5, total=10)
+    pellets.restore(4)
+    assert pellets.total == 10
+    pellets.restore(12)
+    assert pellets.total == 12
@@ -0,0 +1,225 @@
+"""Tests for the coordinator."""
+
+import asyncio
+from datetime import timedelta
+from functools import partial
+from unittest.mock import AsyncMock
+
+import pytest
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.kwb_heaters.coordinator import (
+    PHASE_TOLERANCE,
+    Coordinator,
+    parse_publish_intervals,
+)
+from custom_components.kwb_heaters.src.impl.appliance import Appliance
+from custom_components.kwb_heaters.src.impl.bus.frame import Frame
+
+from .conftest import APPLIANCE_CONFIG
+
+
+def listen(coordinator, key):
+    """Record the value of key every time its listener is called."""
+    calls = []
+    coordinator.async_add_listener(
+        lambda: calls.append(coordinator.data.value(key)), key
+    )
+    return calls
+
+
+def listen_keys(coordinator, keys):
+    """Record the key of every listener called."""
+    calls = []
+    for key in keys:
+        coordinator.async_add_listener(partial(calls.append, key), key)
+    return calls
+
+
+def phase_error(coordinator, interval):
+    """Return the seconds the next refresh is off the phase of interval."""
+    seconds = interval.total_seconds()
+    next_refresh = (
+        coordinator.hass.loop.time() + coordinator.update_interval.total_seconds()
+    )
+    offset = coordinator.phase * seconds
+    return (next_refresh - offset + seconds / 2) % seconds - seconds / 2
+
+
+def test_parse_publish_intervals():
+    assert parse_publish_intervals("32=1, 64=10,") == {32: 1.0, 64: 10.0}
+    assert parse_publish_intervals("") == {}
+    assert parse_publish_intervals(None) == {}
+
+
+@pytest.mark.parametrize("text", ["32", "32=a", "x=1", "32=1=2"])
+def test_parse_publish_intervals_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        parse_publish_intervals(text)
+
+
+@pytest.mark.asyncio
+async def test_push_defers_messages_within_the_publish_interval(hass, appliance):
+    coordinator = Coordinator(
+        hass,
+        appliance,
+        timedelta(seconds=30),
+        push=True,
+        publish_intervals={32: 0.05},
+    )
+    calls = listen(coordinator, "temperature")
+
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    assert calls == [pytest.approx(20.0)]
+
+    # Within the interval, the second message waits and the third joins it
+    appliance.handle_frames([Frame(32, 1, bytes([50, 0, 210, 1]))])
+    appliance.handle_frames([Frame(32, 2, bytes([50, 0, 220, 1]))])
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.1)
+    assert calls == [pytest.approx(20.0), pytest.approx(22.0)]
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_push_shutdown_cancels_deferred_messages(hass, appliance):
+    coordinator = Coordinator(
+        hass,
+        appliance,
+        timedelta(seconds=30),
+        push=True,
+        publish_intervals={32: 0.05},
+    )
+    calls = listen(coordinator, "temperature")
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    appliance.handle_frames([Frame(32, 1, bytes([50, 0, 210, 1]))])
+
+    await coordinator.async_shutdown()
+    await asyncio.sleep(0.1)
+    assert len(calls) == 1
+    assert appliance.message_listener is None
+
+
+@pytest.mark.asyncio
+async def test_only_listeners_of_changed_keys_are_called(hass, appliance):
+    coordinator = Coordinator(hass, appliance, timedelta(seconds=5))
+    calls = listen_keys(coordinator, ("temperature", "boiler_output", "pump"))
+
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    coordinator.async_set_updated_data(appliance)
+    # The first dispatch calls everyone
+    assert sorted(calls) == ["boiler_output", "pump", "temperature"]
+
+    calls.clear()
+    appliance.handle_frames([Frame(32, 1, bytes([50, 0, 210, 1]))])
+    coordinator.async_set_updated_data(appliance)
+    assert calls == ["temperature"]
+
+    calls.clear()
+    appliance.handle_frames([Frame(32, 2, bytes([50, 0, 210, 0]))])
+    coordinator.async_set_updated_data(appliance)
+    assert calls == ["pump"]
+
+    calls.clear()
+    appliance.handle_frames([Frame(32, 3, bytes([50, 0, 210, 0]))])
+    coordinator.async_set_updated_data(appliance)
+    assert calls == []
+
+    # Losing the heater makes every entity unavailable
+    coordinator.async_set_update_error(UpdateFailed("gone"))
+    assert sorted(calls) == ["boiler_output", "pump", "temperature"]
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_live_values_are_dispatched_without_a_new_snapshot(hass, appliance):
+    coordinator = Coordinator(hass, appliance, timedelta(seconds=5))
+    calls = listen_keys(coordinator, ("temperature", "boiler_energy_output"))
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    coordinator.async_set_updated_data(appliance)
+    generation = appliance.snapshot.generation
+
+    calls.clear()
+    await asyncio.sleep(0.01)
+    appliance.handle_frames([Frame(32, 1, bytes([50, 0, 200, 1]))])
+    coordinator.async_set_updated_data(appliance)
+    assert appliance.snapshot.generation == generation
+    assert calls == ["boiler_energy_output"]
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_refreshes_are_moved_onto_their_phase(hass, appliance):
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    appliance.async_scrape = AsyncMock(return_value=True)
+    interval = timedelta(seconds=10)
+    coordinator = Coordinator(hass, appliance, interval, phase=0.5)
+
+    await coordinator.async_refresh()
+    assert coordinator.update_interval <= interval
+    assert abs(phase_error(coordinator, interval)) <= PHASE_TOLERANCE
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_interval_follows_the_boiler_state(hass, signal_map):
+    appliance = Appliance(
+        {**APPLIANCE_CONFIG, "persistent_connection": False}, signal_map
+    )
+    appliance.async_scrape = AsyncMock(return_value=True)
+    active, idle = timedelta(seconds=5), timedelta(seconds=60)
+    coordinator = Coordinator(hass, appliance, active, scan_intervals=(active, idle))
+
+    appliance.handle_frames([Frame(32, 0, bytes([0, 0, 200, 0]))])
+    await coordinator.async_refresh()
+    assert not coordinator.active
+    assert appliance.poll_interval == 60
+    assert abs(phase_error(coordinator, idle)) <= PHASE_TOLERANCE
+
+    # An alarm counts as active, like a running boiler
+    appliance.handle_frames([Frame(33, 0, bytes([1]))])
+    await coordinator.async_refresh()
+    assert coordinator.active
+    assert appliance.poll_interval == 5
+    assert coordinator.update_interval <= active
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_push_holds_messages_while_idle(hass, appliance):
+    coordinator = Coordinator(
+        hass,
+        appliance,
+        timedelta(seconds=30),
+        push=True,
+        publish_intervals={32: 0},
+        scan_intervals=(timedelta(seconds=5), timedelta(seconds=60)),
+    )
+    calls = listen(coordinator, "temperature")
+
+    appliance.handle_frames([Frame(32, 0, bytes([0, 0, 200, 0]))])
+    appliance.handle_frames([Frame(32, 1, bytes([0, 0, 210, 0]))])
+    assert len(calls) == 1
+
+    # Turning active publishes what was held back right away
+    appliance.handle_frames([Frame(33, 0, bytes([1]))])
+    assert calls == [pytest.approx(20.0), pytest.approx(21.0)]
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stale_messages_update_their_calculated_values(hass, appliance):
+    coordinator = Coordinator(hass, appliance, timedelta(seconds=5))
+    calls = listen_keys(coordinator, ("temperature", "boiler_power", "alarm"))
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+    appliance.handle_frames([Frame(33, 0, bytes([0]))])
+    coordinator.async_set_updated_data(appliance)
+
+    calls.clear()
+    message = appliance.message_cache[32]
+    appliance.message_cache[32] = message._replace(received=message.received - 10**6)
+    coordinator.async_update_listeners()
+    assert sorted(calls) == ["boiler_power", "temperature"]
+    await coordinator.async_shutdown()
@@ -0,0 +1,70 @@
+"""Tests for checkpointing counters in .storage."""
+
+import asyncio
+import os
+
+import pytest
+
+from custom_components.kwb_heaters.src.impl.counters import CounterStore, SnapshotStore
+
+
+def write_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+@pytest.mark.asyncio
+async def test_flush_and_load(hass):
+    store = CounterStore(hass, "test_heater")
+    assert await store.async_load() == {}
+
+    store.attach(lambda: {"boiler_energy": 12.5})
+    await store.async_flush()
+    assert await CounterStore(hass, "test_heater").async_load() == {
+        "boiler_energy": 12.5
+    }
+    # Snapshots are kept apart from counters
+    assert await SnapshotStore(hass, "test_heater").async_load() == {}
+
+
+@pytest.mark.asyncio
+async def test_scheduled_saves_are_batched(hass, monkeypatch):
+    monkeypatch.setattr(
+        "custom_components.kwb_heaters.src.impl.counters.COUNTER_SAVE_DELAY", 0.01
+    )
+    counters = {"boiler_energy": 1.0}
+    calls = []
+
+    def current():
+        calls.append(True)
+        return dict(counters)
+
+    store = CounterStore(hass, "test_heater")
+    store.attach(current)
+    store.async_schedule_save()
+    counters["boiler_energy"] = 2.0
+    store.async_schedule_save()
+    await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+
+    # One write, with the counters at write time
+    assert len(calls) == 1
+    assert await CounterStore(hass, "test_heater").async_load() == {
+        "boiler_energy": 2.0
+    }
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_saved_before_attach(hass):
+    store = CounterStore(hass, "test_heater")
+    store.async_schedule_save()
+    await store.async_flush()
+    assert await store.async_load() == {}
+
+
+@pytest.mark.asyncio
+async def test_broken_file_starts_over(hass):
+    path = hass.config.path(".storage", "kwb_heaters.test_heater.counters")
+    await hass.async_add_executor_job(write_file, path, "{broken")
+    assert await CounterStore(hass, "test_heater").async_load() == {}
@@ -0,0 +1,87 @@
+"""Tests for compiled payload decoding against the generic decoder."""
+
+import random
+
+import pytest
+
+from custom_components.kwb_heaters.src.impl.bus.decoder import (
+    MessageDecoder,
+    decode_payload,
+)
+from custom_components.kwb_heaters.src.impl.bus.signal_map import (
+    SignalDefinition,
+)
+
+
+def signal(key, kind, offset, length=0, factor=None):
+    return SignalDefinition(
+        message_id=32,
+        name=key,
+        key=key,
+        kind=kind,
+        offset=offset,
+        length=length,
+        factor=factor,
+        unit=None,
+        state_class=None,
+        device_class=None,
+    )
+
+
+SIGNALS = (
+    signal("temperature", "s", 0, 2, 0.1),
+    signal("output", "u", 2, 1),
+    signal("counter", "u", 4, 4),
+    signal("offset", "s", 8, 1, 1),
+    signal("pump", "b", 72),
+    signal("alarm", "b", 79),
+)
+
+
+def numeric(values):
+    return {key: value for key, value in values.items() if key not in ("pump", "alarm")}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_matches_generic(seed):
+    decoder = MessageDecoder(SIGNALS)
+    assert decoder.compiled
+    payload = random.Random(seed).randbytes(decoder.payload_size)
+    assert decoder.decode(payload) == pytest.approx(
+        numeric(decode_payload(payload, SIGNALS))
+    )
+
+
+def test_signed_and_scaled_values():
+    decoder = MessageDecoder(SIGNALS)
+    payload = bytes([0xFF, 0x38, 80, 0, 0, 0, 1, 0, 0xFE, 0])
+    assert decoder.decode(payload) == pytest.approx(
+        {"temperature": -20.0, "output": 80, "counter": 256, "offset": -2}
+    )
+
+
+def test_odd_widths_fall_back_to_generic():
+    signals = (signal("wide", "u", 0, 3), signal("narrow", "u", 3, 1))
+    decoder = MessageDecoder(signals)
+    assert not decoder.compiled
+    assert decoder.decode(b"\x01\x02\x03\x04") == {"wide": 0x010203, "narrow": 4}
+
+
+def test_short_payload_decodes_what_it_holds():
+    decoder = MessageDecoder(SIGNALS)
+    assert decoder.decode(b"\x00\x64\x32") == {"temperature": 10.0, "output": 50}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bits_match_generic(seed):
+    decoder = MessageDecoder(SIGNALS)
+    payload = random.Random(seed).randbytes(decoder.payload_size)
+    values = decode_payload(payload, SIGNALS)
+    bits = decoder.decode_bits(payload)
+    for bit, key in decoder.bit_keys.items():
+        assert bits >> bit & 1 == values[key]
+
+
+def test_payload_size_covers_bits():
+    assert MessageDecoder(SIGNALS).payload_size == 10
+    assert MessageDecoder((signal("flag", "b", 3),)).payload_size == 1
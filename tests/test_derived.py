@@ -0,0 +1,120 @@
+"""Tests for evaluating derived signals."""
+
+from graphlib import CycleError
+
+import pytest
+
+from custom_components.kwb_heaters.src.impl.derived import (
+    DerivedGraph,
+    DerivedSignal,
+)
+
+
+def counting(key, inputs, f_compute, calls, always=False):
+    def compute(values, now):
+        calls.append(key)
+        return f_compute(values, now)
+
+    return DerivedSignal(key, inputs, compute, always)
+
+
+def test_dependency_order_and_first_evaluation():
+    calls = []
+    graph = DerivedGraph(
+        [
+            # Declared before what it depends on
+            counting("power", ("on", "output"), lambda v, n: v["output"] * 2, calls),
+            counting("on", ("output",), lambda v, n: v["output"] > 0, calls),
+        ]
+    )
+    values = {"output": 5}
+    assert graph.evaluate(values, (), 0) == {"power", "on"}
+    assert calls == ["on", "power"]
+    assert values == {"output": 5, "on": True, "power": 10}
+
+
+def test_only_dirty_signals_are_computed():
+    calls = []
+    graph = DerivedGraph(
+        [
+            counting("on", ("output",), lambda v, n: v["output"] > 0, calls),
+            counting("hot", ("temperature",), lambda v, n: v["temperature"] > 9, calls),
+        ]
+    )
+    values = {"output": 5, "temperature": 5}
+    graph.evaluate(values, values.keys(), 0)
+    calls.clear()
+
+    values["temperature"] = 70
+    assert graph.evaluate(values, ("temperature",), 1) == {"hot"}
+    assert calls == ["hot"]
+
+
+def test_unchanged_value_does_not_wake_dependents():
+    calls = []
+    graph = DerivedGraph(
+        [
+            counting("on", ("output",), lambda v, n: v["output"] > 0, calls),
+            counting("label", ("on",), lambda v, n: "on" if v["on"] else "off", calls),
+        ]
+    )
+    values = {"output": 5}
+    graph.evaluate(values, ("output",), 0)
+    calls.clear()
+
+    values["output"] = 7
+    assert graph.evaluate(values, ("output",), 1) == set()
+    assert calls == ["on"]
+
+
+def test_cycles_raise():
+    with pytest.raises(CycleError):
+        DerivedGraph(
+            [
+                DerivedSignal("a", ("b",), lambda v, n: 1),
+                DerivedSignal("b", ("a",), lambda v, n: 1),
+            ]
+        )
+
+
+def test_always_signals_are_kept_live():
+    graph = DerivedGraph(
+        [
+            DerivedSignal("on", ("output",), lambda v, n: v["output"] > 0),
+            DerivedSignal("seconds", ("on",), lambda v, n: n, always=True),
+        ]
+    )
+    values = {"output": 5}
+    assert graph.evaluate(values, ("output",), 1) == {"on", "seconds"}
+    assert "seconds" not in values
+    assert graph.live == {"seconds": 1}
+    assert graph.live_keys == {"seconds"}
+
+    # Time goes on without any value changing
+    assert graph.advance(values, 2) == {"seconds"}
+    assert graph.live == {"seconds": 2}
+
+
+def test_nothing_may_depend_on_always_signals():
+    with pytest.raises(ValueError):
+        DerivedGraph(
+            [
+                DerivedSignal("seconds", (), lambda v, n: n, always=True),
+                DerivedSignal("minutes", ("seconds",), lambda v, n: n / 60),
+            ]
+        )
+
+
+def test_sources_reach_through_derived_signals():
+    graph = DerivedGraph(
+        [
+            DerivedSignal("on", ("output",), lambda v, n: v["output"] > 0),
+            DerivedSignal("power", ("on", "nominal"), lambda v, n: v["on"] * 2),
+            DerivedSignal("seconds", (), lambda v, n: n, always=True),
+        ]
+    )
+    assert graph.sources == {
+        "on": {"output"},
+        "power": {"output", "nominal"},
+        "seconds": set(),
+    }
@@ -0,0 +1,72 @@
+"""Tests for integrating boiler output into energy."""
+
+import random
+
+import pytest
+
+from custom_components.kwb_heaters.src.impl.energy import (
+    EnergyIntegrator,
+)
+
+
+def test_constant_output():
+    energy = EnergyIntegrator(nominal_power=20, efficiency=80, max_gap=120)
+    for second in range(0, 3601, 10):
+        energy.add_sample(50, second)
+    # 10 kW for an hour, burning 12.5 kWh of fuel for it
+    assert energy.energy == pytest.approx(10)
+    assert energy.fuel_energy == pytest.approx(12.5)
+
+
+def test_trapezoid_between_samples():
+    energy = EnergyIntegrator(nominal_power=36, efficiency=None, max_gap=600)
+    assert energy.add_sample(0, 0) == 0
+    # Ramp from 0 to 36 kW over 100 s
+    assert energy.add_sample(100, 100) == pytest.approx(18 * 100 / 3600)
+
+
+def test_gaps_are_clamped():
+    energy = EnergyIntegrator(nominal_power=36, efficiency=None, max_gap=60)
+    energy.add_sample(100, 0)
+    assert energy.add_sample(100, 3600) == pytest.approx(36 * 60 / 3600)
+
+
+def test_time_going_backwards_adds_nothing():
+    energy = EnergyIntegrator(nominal_power=36, efficiency=None, max_gap=60)
+    energy.add_sample(100, 10)
+    assert energy.add_sample(100, 5) == 0
+    assert energy.energy == 0
+
+
+def test_batches_match_single_samples():
+    rng = random.Random(0)
+    timestamps = sorted(rng.uniform(0, 86400) for _ in range(5000))
+    outputs = [rng.uniform(0, 100) for _ in timestamps]
+    single = EnergyIntegrator(nominal_power=25, efficiency=90, max_gap=120)
+    for output, timestamp in zip(outputs, timestamps):
+        single.add_sample(output, timestamp)
+    batched = EnergyIntegrator(nominal_power=25, efficiency=90, max_gap=120)
+    # Batches continue from the last sample of the one before
+    for start in range(0, len(outputs), 700):
+        batched.add_samples(
+            outputs[start : start + 700], timestamps[start : start + 700]
+        )
+    assert batched.energy == pytest.approx(single.energy, rel=1e-12)
+    assert batched.fuel_energy == pytest.approx(single.fuel_energy, rel=1e-12)
+
+
+def test_restore_never_goes_backwards():
+    energy = EnergyIntegrator(nominal_power=20, efficiency=50, max_gap=60, energy=10)
+    energy.restore(5)
+    assert energy.energy == 10
+    energy.restore(15)
+    assert energy.energy == 15
+    assert energy.fuel_energy == 30
+
+
+def test_interrupt_skips_the_gap():
+    energy = EnergyIntegrator(nominal_power=36, efficiency=None, max_gap=600)
+    energy.add_sample(100, 0)
+    energy.interrupt()
+    assert energy.add_sample(100, 100) == 0
+    assert energy.add_sample(100, 200) == pytest.approx(1)
@@ -0,0 +1,65 @@
+"""Tests for framing of the raw bus byte stream."""
+
+from custom_components.kwb_heaters.src.impl.bus.frame import (
+    Frame,
+    FrameParser,
+    checksum,
+    encode_frame,
+    pad,
+    unpad,
+)
+
+
+def test_pad_round_trip():
+    data = bytes([1, 2, 3, 2, 2, 0])
+    assert pad(data) == bytes([1, 2, 0, 3, 2, 0, 2, 0, 0])
+    assert unpad(pad(data)) == data
+
+
+def test_unpad_without_pad_bytes_copies():
+    data = bytearray(b"\x01\x03")
+    assert unpad(data) == b"\x01\x03"
+    assert isinstance(unpad(data), bytes)
+
+
+def test_checksum_wraps_at_255():
+    # Rotating 2 left gives 4, and 4 + 0xFF overflows past 255
+    assert checksum(b"\xff") == 4
+    assert checksum(b"") == 2
+
+
+def test_encode_then_parse():
+    payload = bytes([0, 2, 5, 2, 0, 255])
+    frames = FrameParser().feed(encode_frame(32, 7, payload))
+    assert frames == [Frame(message_id=32, counter=7, payload=payload)]
+
+
+def test_frames_split_across_chunks():
+    stream = encode_frame(32, 1, b"\x01\x02\x03") + encode_frame(33, 2, b"\x02")
+    parser = FrameParser()
+    frames = []
+    for position in range(len(stream)):
+        frames += parser.feed(stream[position : position + 1])
+    assert [(frame.message_id, frame.payload) for frame in frames] == [
+        (32, b"\x01\x02\x03"),
+        (33, b"\x02"),
+    ]
+
+
+def test_resync_after_garbage_and_corruption():
+    good = encode_frame(64, 3, b"\x10\x20")
+    damaged = bytearray(encode_frame(65, 4, b"\x30\x40\x50"))
+    damaged[-1] ^= 0xFF
+    parser = FrameParser()
+    frames = parser.feed(b"\x00\x02junk" + bytes(damaged) + good)
+    assert [frame.message_id for frame in frames] == [64]
+    assert parser.corrupted >= 1
+
+
+def test_reset_drops_partial_frame():
+    frame = encode_frame(32, 1, b"\x01\x02\x03")
+    parser = FrameParser()
+    assert parser.feed(frame[:4]) == []
+    parser.reset()
+    assert parser.feed(frame[4:]) == []
+    assert parser.feed(frame) == [Frame(32, 1, b"\x01\x02\x03")]
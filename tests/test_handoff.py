@@ -0,0 +1,77 @@
+"""Tests for handing the appliance validated by the config flow over to setup."""
+
+import asyncio
+
+import pytest
+
+from custom_components.kwb_heaters.const import DATA_HANDOFF, DOMAIN
+from custom_components.kwb_heaters.src.impl.appliance import Appliance
+from custom_components.kwb_heaters.src.impl.bus.frame import Frame
+from custom_components.kwb_heaters.src.impl.handoff import (
+    async_offer_appliance,
+    async_take_appliance,
+)
+
+from .conftest import APPLIANCE_CONFIG
+
+
+@pytest.mark.asyncio
+async def test_take_returns_the_offer_once(hass, appliance):
+    async_offer_appliance(hass, appliance)
+
+    assert async_take_appliance(hass, "Other Heater", "localhost", 8899) is None
+    assert async_take_appliance(hass, "Test Heater", "localhost", 8900) is None
+    assert async_take_appliance(hass, "Test Heater", "localhost", 8899) is appliance
+    assert async_take_appliance(hass, "Test Heater", "localhost", 8899) is None
+    assert not hass.data[DOMAIN][DATA_HANDOFF]
+
+
+@pytest.mark.asyncio
+async def test_take_without_offers(hass):
+    assert async_take_appliance(hass, "Test Heater", "localhost", 8899) is None
+
+
+@pytest.mark.asyncio
+async def test_replaced_offer_is_released(hass, appliance, signal_map, monkeypatch):
+    stopped = []
+
+    async def stop_streaming():
+        stopped.append(True)
+
+    monkeypatch.setattr(appliance, "async_stop_streaming", stop_streaming)
+    async_offer_appliance(hass, appliance)
+    newer = Appliance(APPLIANCE_CONFIG, signal_map)
+    async_offer_appliance(hass, newer)
+    await asyncio.sleep(0)
+
+    assert stopped == [True]
+    assert async_take_appliance(hass, "Test Heater", "localhost", 8899) is newer
+
+
+@pytest.mark.asyncio
+async def test_expired_offer_is_released(hass, appliance, monkeypatch):
+    stopped = []
+
+    async def stop_streaming():
+        stopped.append(True)
+
+    monkeypatch.setattr(appliance, "async_stop_streaming", stop_streaming)
+    monkeypatch.setattr(
+        "custom_components.kwb_heaters.src.impl.handoff.HANDOFF_TTL", 0.01
+    )
+    async_offer_appliance(hass, appliance)
+    await asyncio.sleep(0.05)
+
+    assert stopped == [True]
+    assert async_take_appliance(hass, "Test Heater", "localhost", 8899) is None
+
+
+def test_adopt_takes_over_what_was_read(appliance, signal_map):
+    appliance.handle_frames([Frame(32, 0, bytes([50, 0, 200, 1]))])
+
+    heater = Appliance(APPLIANCE_CONFIG, signal_map)
+    heater.adopt(appliance)
+    assert heater.value("temperature") == pytest.approx(20.0)
+    assert heater.value("boiler_power") == 10
+    assert heater.is_on("pump")
+    assert heater.message_cache.keys() == {32}
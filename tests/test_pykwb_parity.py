@@ -0,0 +1,87 @@
+"""Tests that framing and decoding give the same values as pykwb.
+
+The same frames go through KWBMessageStream and through FrameParser and
+the compiled decoders of the real signal maps, and every signal has to
+come out the same. Payloads are random, so every offset, width, sign and
+bit position of the maps is exercised.
+"""
+
+import random
+
+from pykwb.kwb import ByteReader, KWBMessageStream
+import pytest
+
+from custom_components.kwb_heaters.src.impl.appliance import Appliance
+from custom_components.kwb_heaters.src.impl.bus.frame import FrameParser, encode_frame
+from custom_components.kwb_heaters.src.impl.bus.signal_map import load_signal_map
+
+from .conftest import APPLIANCE_CONFIG
+
+
+class LoopByteReader(ByteReader):
+    """pykwb reader that serves the same bytes over and over."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, size=1):
+        chunk = bytearray()
+        while len(chunk) < size:
+            if self.position >= len(self.data):
+                self.position = 0
+            part = self.data[self.position : self.position + size - len(chunk)]
+            chunk += part
+            self.position += len(part)
+        return bytes(chunk)
+
+
+@pytest.fixture(scope="module")
+def signal_map():
+    return load_signal_map("comfort_3")
+
+
+def generate_stream(signal_map, seed):
+    """Return one frame of every mapped message id, with random payloads."""
+    rng = random.Random(seed)
+    return b"".join(
+        encode_frame(message_id, seed % 256, rng.randbytes(decoder.payload_size))
+        for message_id, decoder in signal_map.decoders.items()
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_values_match_pykwb(signal_map, seed):
+    stream = generate_stream(signal_map, seed)
+    appliance = Appliance(
+        {**APPLIANCE_CONFIG, "persistent_connection": False}, signal_map
+    )
+    message_stream = KWBMessageStream(
+        reader=LoopByteReader(stream),
+        signal_maps=signal_map.raw,
+        heater_config=appliance.heater_config,
+        last_values=appliance.last_values,
+    )
+    message_stream.open()
+    expected = message_stream.read_data_once(list(signal_map.decoders), 5)
+    message_stream.close()
+
+    frames = FrameParser().feed(stream)
+    assert [frame.message_id for frame in frames] == list(signal_map.decoders)
+    for frame in frames:
+        decoder = signal_map.decoders[frame.message_id]
+        values = decoder.decode(frame.payload)
+        bits = decoder.decode_bits(frame.payload)
+        for signal in signal_map.messages[frame.message_id]:
+            assert signal.key in expected, signal
+            if signal.is_binary:
+                actual = bool(bits >> signal.offset & 1)
+                assert actual == bool(expected[signal.key]), signal
+            else:
+                assert values[signal.key] == pytest.approx(expected[signal.key]), signal
@@ -0,0 +1,27 @@
+"""Tests for parsing pykwb signal maps."""
+
+from custom_components.kwb_heaters.src.impl.bus.signal_map import (
+    SignalDefinition,
+    SignalMap,
+)
+
+from .conftest import RAW_SIGNAL_MAPS
+
+
+def test_signal_definition_from_short_tuple():
+    definition = SignalDefinition.from_tuple(32, "Boiler Temp", ("s", 0, 2, 0.1))
+    assert definition.key == "boiler_temp"
+    assert definition.unit is None
+    definition = SignalDefinition.from_tuple(
+        32, "Boiler Temp", ("s", 0, 2, 0.1, "°C", "boiler_temperature")
+    )
+    assert definition.key == "boiler_temperature"
+
+
+def test_signal_map_indexes():
+    signal_map = SignalMap(RAW_SIGNAL_MAPS)
+    assert set(signal_map.messages) == {32, 33}
+    assert signal_map.message_ids["temperature"] == 32
+    assert signal_map.message_ids["alarm"] == 33
+    assert signal_map.bit_positions == {"pump": (32, 24), "alarm": (33, 0)}
+    assert signal_map.for_message(64) is None
@@ -0,0 +1,198 @@
+"""Tests for writing hourly statistics of the lifetime counters."""
+
+from datetime import datetime, timezone
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.kwb_heaters.const import DOMAIN, SERVICE_IMPORT_STATISTICS
+from custom_components.kwb_heaters.services import async_setup_services
+from custom_components.kwb_heaters.src.impl import statistics
+from custom_components.kwb_heaters.src.impl.statistics import (
+    StatisticsWriter,
+    read_statistics_csv,
+)
+
+ENERGY_ID = "kwb_heaters:test_heater_boiler_energy_output"
+
+
+class Recorder:
+    """Stands in for the recorder, which needs more than the tests install."""
+
+    def __init__(self, hass, last_rows=None):
+        self.hass = hass
+        self.last_rows = last_rows or {}
+        # statistic_id -> rows written
+        self.written: dict[str, list[dict]] = {}
+
+    def install(self, monkeypatch):
+        recorder = ModuleType("homeassistant.components.recorder")
+        recorder.get_instance = lambda hass: self
+        recorder_statistics = ModuleType("homeassistant.components.recorder.statistics")
+        recorder_statistics.get_last_statistics = self.get_last_statistics
+        recorder_statistics.async_add_external_statistics = self.add
+        monkeypatch.setitem(sys.modules, recorder.__name__, recorder)
+        monkeypatch.setitem(
+            sys.modules, recorder_statistics.__name__, recorder_statistics
+        )
+
+    async def async_add_executor_job(self, target, *args):
+        return await self.hass.async_add_executor_job(target, *args)
+
+    def get_last_statistics(self, hass, count, statistic_id, convert, types):
+        rows = self.last_rows.get(statistic_id)
+        return {statistic_id: rows} if rows else {}
+
+    def add(self, hass, metadata, rows):
+        self.written.setdefault(metadata["statistic_id"], []).extend(rows)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=datetime(2024, 1, 1, 10, 5, tzinfo=timezone.utc))
+    monkeypatch.setattr(
+        statistics, "dt_util", SimpleNamespace(utcnow=lambda: clock.now)
+    )
+    return clock
+
+
+async def make_writer(hass, monkeypatch, last_rows=None):
+    recorder = Recorder(hass, last_rows)
+    recorder.install(monkeypatch)
+    writer = StatisticsWriter(hass, "test_heater", "KWB Test Heater")
+    await writer.async_load()
+    return writer, recorder
+
+
+@pytest.mark.asyncio
+async def test_hours_are_written_when_the_next_begins(hass, monkeypatch, clock):
+    writer, recorder = await make_writer(hass, monkeypatch)
+    values = {"boiler_energy_output": 100.0}
+    writer.attach(lambda: values)
+
+    writer.async_update()
+    values["boiler_energy_output"] = 104.0
+    writer.async_update()
+    assert recorder.written == {}
+
+    clock.now = clock.now.replace(hour=11, minute=1)
+    values["boiler_energy_output"] = 105.0
+    writer.async_update()
+    assert recorder.written == {
+        ENERGY_ID: [
+            {
+                "start": datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+                "state": 104.0,
+                "sum": 4.0,
+            }
+        ]
+    }
+
+    # Flushing writes the hour in progress
+    writer.async_flush()
+    assert recorder.written[ENERGY_ID][-1]["sum"] == 5.0
+
+
+@pytest.mark.asyncio
+async def test_sums_continue_from_the_last_row(hass, monkeypatch, clock):
+    writer, recorder = await make_writer(
+        hass, monkeypatch, {ENERGY_ID: [{"state": 100.0, "sum": 40.0}]}
+    )
+    values = {"boiler_energy_output": 110.0}
+    writer.attach(lambda: values)
+    writer.async_update()
+
+    # A counter that went backwards books no negative increase
+    values["boiler_energy_output"] = 2.0
+    writer.async_update()
+    values["boiler_energy_output"] = 3.0
+    writer.async_update()
+    writer.async_flush()
+    assert recorder.written[ENERGY_ID][-1] == {
+        "start": datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+        "state": 3.0,
+        "sum": 51.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_written_before_the_first_update(hass, monkeypatch, clock):
+    writer, recorder = await make_writer(hass, monkeypatch)
+    writer.async_flush()
+    writer.attach(dict)
+    writer.async_update()
+    writer.async_flush()
+    assert recorder.written == {}
+
+
+BACKFILL_CSV = f"""statistic_id,unit,start,state,sum
+{ENERGY_ID},kWh,2024-01-01T09:00:00+00:00,12.0,2.0
+{ENERGY_ID},kWh,2024-01-01T08:00:00+00:00,10.0,0.0
+"""
+
+
+def test_read_statistics_csv(tmp_path):
+    path = tmp_path / "backfill.csv"
+    path.write_text(BACKFILL_CSV)
+    assert read_statistics_csv(str(path)) == {
+        ENERGY_ID: [
+            {
+                "start": datetime(2024, 1, 1, 8, tzinfo=timezone.utc),
+                "state": 10.0,
+                "sum": 0.0,
+            },
+            {
+                "start": datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+                "state": 12.0,
+                "sum": 2.0,
+            },
+        ]
+    }
+
+
+@pytest.mark.asyncio
+async def test_import_service(hass, monkeypatch, clock, tmp_path):
+    writer, recorder = await make_writer(hass, monkeypatch)
+    hass.data[DOMAIN] = {"entry": {"statistics": writer}}
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+    path = tmp_path / "backfill.csv"
+    path.write_text(BACKFILL_CSV)
+    async_setup_services(hass)
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_IMPORT_STATISTICS, {"file_path": str(path)}, blocking=True
+    )
+    assert [row["sum"] for row in recorder.written[ENERGY_ID]] == [0.0, 2.0]
+
+    # Live sums continue from the last imported row
+    values = {"boiler_energy_output": 15.0}
+    writer.attach(lambda: values)
+    writer.async_update()
+    writer.async_flush()
+    assert recorder.written[ENERGY_ID][-1]["sum"] == 5.0
+
+
+@pytest.mark.asyncio
+async def test_import_service_rejects_unknown_ids(hass, monkeypatch, tmp_path):
+    writer, recorder = await make_writer(hass, monkeypatch)
+    hass.data[DOMAIN] = {"entry": {"statistics": writer}}
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+    path = tmp_path / "backfill.csv"
+    path.write_text(BACKFILL_CSV.replace("test_heater", "other_heater"))
+    async_setup_services(hass)
+
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_IMPORT_STATISTICS, {"file_path": str(path)}, blocking=True
+        )
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_STATISTICS,
+            {"file_path": "/etc/passwd"},
+            blocking=True,
+        )
+    assert recorder.written == {}